@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+
+# crawler modules are located in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawlerParser
+import webscraperFunctions as crawler
+from crawlerLimiter import AdaptiveLimiter
+from crawlerMetrics import metrics
+from crawlerPipeline import crawlPipeline
+from crawlerProcessPool import ParsingCrawler
+from crawlerSession import CrawlerSession
+from replayServer import ReplayServer, corpusDirectory, replaySession
+
+
+def loadCorpus(directory=corpusDirectory):
+
+    # variables
+    manifest = json.load(open(os.path.join(directory, "manifest.json"), encoding="utf-8"))
+    corpus = []
+
+    # page type is defined by file name (result-*, job-*, company-*-jobs, company-*-profile)
+    for file in sorted(set(manifest["pages"].values())):
+        kind = "profile" if file.endswith("-profile.html") else file.split("-")[0]
+        corpus.append((kind, open(os.path.join(directory, file), encoding="utf-8").read()))
+
+    # return list of (page type, html)
+    return corpus
+
+
+def extract(kind, html):
+
+    # parse page and run the extractor for its type
+    if kind == "result":
+        soup = crawlerParser.parseHtml(html, "result")
+        crawler.getNumberOfResults(soup)
+        return crawler.getResultData(soup)
+    if kind == "job":
+        return crawler.extractJobData(crawlerParser.parseHtml(html, "job"), None, None)
+    if kind == "company":
+        return crawler.extractCompanyData({"company": None, "companyLink": None}, crawlerParser.parseHtml(html, "company"))
+    return crawler.extractCompanyProfile({"location": {}, "rating": {}, "json": {}}, crawlerParser.parseHtml(html, "company"))
+
+
+def benchmarkParsers(corpus, repeat=5):
+    '''benchmarkParsers measures pages per second and allocations per page for every parser backend'''
+
+    # variables
+    results = {}
+
+    for parser in crawlerParser.availableParsers():
+        for partial in [False, True]:
+
+            crawlerParser.setParser(parser, partial)
+
+            for kind in sorted(set(kind for kind, _ in corpus)):
+
+                pages = [html for pageKind, html in corpus if pageKind == kind]
+
+                # throughput
+                start = perf_counter()
+                for _ in range(repeat):
+                    for html in pages:
+                        extract(kind, html)
+                seconds = perf_counter() - start
+
+                # allocations (separate pass, tracing slows down parsing)
+                tracemalloc.start()
+                peak = 0
+                for html in pages:
+                    tracemalloc.reset_peak()
+                    before = tracemalloc.get_traced_memory()[0]
+                    extract(kind, html)
+                    peak += tracemalloc.get_traced_memory()[1] - before
+                tracemalloc.stop()
+
+                results["{0}/{1}/{2}".format(parser, "partial" if partial else "full", kind)] = {
+                    "pagesPerSecond": len(pages) * repeat / seconds,
+                    "peakBytesPerPage": peak / len(pages)}
+
+    # reset parser settings
+    crawlerParser.setParser("html.parser", True)
+
+    # return results (dict)
+    return results
+
+
+def createSession(server, concurrency):
+
+    # limiter without politeness delay (replay server is local)
+    limiter = AdaptiveLimiter(initialConcurrency=concurrency, minConcurrency=concurrency, maxConcurrency=concurrency,
+                              initialInterval=0, minInterval=0)
+
+    # return session, which is redirected to replay server
+    return replaySession(server, CrawlerSession(poolSize=max(10, concurrency), limiter=limiter))
+
+
+def crawlSequential(server, jobTitle, concurrency):
+
+    session = createSession(server, concurrency)
+    jobList = [job for job in crawler.initJobSearch(jobTitle, session=session) if inCorpus(server, job["jobLink"])]
+    jobs = [crawler.getJobData(job["jobLink"], job["id"], session=session) for job in jobList]
+    companies = [crawler.getCompanyData(company, session=session) for company in distinctCompanies(jobList)]
+    return len(jobList) + len(jobs) + len(companies)
+
+
+def crawlAsync(server, jobTitle, concurrency):
+
+    session = createSession(server, concurrency)
+    jobList = [job for job in crawler.initJobSearch(jobTitle, concurrency=concurrency, ratePerSecond=1000, session=session) if inCorpus(server, job["jobLink"])]
+    jobs = [crawler.getJobData(job["jobLink"], job["id"], session=session) for job in jobList]
+    companies = [crawler.getCompanyData(company, session=session) for company in distinctCompanies(jobList)]
+    return len(jobList) + len(jobs) + len(companies)
+
+
+def crawlStreaming(server, jobTitle, concurrency):
+
+    session = createSession(server, concurrency)
+    return len(list(crawlPipeline(jobTitle, detailWorkers=concurrency, companyWorkers=max(1, concurrency // 2), session=session)))
+
+
+def crawlProcessPool(server, jobTitle, concurrency):
+
+    session = createSession(server, concurrency)
+    jobList = [job for job in crawler.initJobSearch(jobTitle, session=session) if inCorpus(server, job["jobLink"])]
+    with ParsingCrawler(fetchWorkers=concurrency, session=session) as parsingCrawler:
+        jobs = parsingCrawler.getJobData(jobList)
+        companies = parsingCrawler.getCompanyData(distinctCompanies(jobList))
+    return len(jobList) + len(jobs) + len(companies)
+
+
+def inCorpus(server, link):
+
+    # only recorded pages are crawled
+    return link.replace("https://" + server.manifest["host"], "") in server.manifest["pages"]
+
+
+def distinctCompanies(jobList):
+
+    # distinct companies by link
+    return list({job["companyLink"]: {"company": job["company"], "companyLink": job["companyLink"]} for job in jobList}.values())
+
+
+# crawl modes of the benchmark
+crawlModes = {"sequential": crawlSequential, "async": crawlAsync, "pipeline": crawlStreaming, "processPool": crawlProcessPool}
+
+
+def benchmarkCrawl(server, concurrencies=(1, 4, 8)):
+    '''benchmarkCrawl measures end-to-end crawl time against the replay server for every crawl mode and concurrency'''
+
+    # variables
+    results = {}
+    jobTitle = server.manifest["jobTitle"]
+
+    for mode, function in crawlModes.items():
+        for concurrency in concurrencies:
+
+            # sequential mode does not use concurrency
+            if mode == "sequential" and concurrency != concurrencies[0]:
+                continue
+
+            metrics.reset()
+            start = perf_counter()
+            items = function(server, jobTitle, concurrency)
+            seconds = perf_counter() - start
+
+            results["{0}/{1}".format(mode, concurrency)] = {"seconds": seconds, "itemsPerSecond": items / seconds}
+
+    # return results (dict)
+    return results
+
+
+def compareResults(results, baseline, tolerance):
+    '''compareResults returns all metrics which are slower than baseline (more than tolerance)'''
+
+    # variables
+    regressions = []
+
+    for group in ["parsers", "crawl"]:
+        for name, values in results.get(group, {}).items():
+
+            reference = baseline.get(group, {}).get(name)
+            if not reference:
+                continue
+
+            # higher is better for throughput
+            key = "pagesPerSecond" if group == "parsers" else "itemsPerSecond"
+            if values[key] < reference[key] * (1 - tolerance):
+                regressions.append("{0} {1}: {2:.1f} < {3:.1f} {4}".format(group, name, values[key], reference[key], key))
+
+    # return regressions (list)
+    return regressions
+
+
+if __name__ == "__main__":
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="offline benchmark for the stepstone extractors")
+    parser.add_argument("--corpus", default=corpusDirectory)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated server latency in seconds")
+    parser.add_argument("--output", help="store results as json")
+    parser.add_argument("--compare", help="baseline json -> exit code 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # variables
+    results = {}
+
+    # parser benchmark
+    results["parsers"] = benchmarkParsers(loadCorpus(args.corpus), args.repeat)
+    for name, values in results["parsers"].items():
+        print("{0:<32} {1:>10.1f} pages/s {2:>12.0f} peak bytes/page".format(name, values["pagesPerSecond"], values["peakBytesPerPage"]))
+
+    # crawl benchmark
+    with ReplayServer(args.corpus, latency=args.latency) as server:
+        results["crawl"] = benchmarkCrawl(server, args.concurrency)
+    for name, values in results["crawl"].items():
+        print("{0:<32} {1:>10.2f} s {2:>10.1f} items/s".format(name, values["seconds"], values["itemsPerSecond"]))
+
+    # store results
+    if args.output:
+        json.dump(results, open(args.output, "w"), indent=2)
+
+    # compare with baseline
+    if args.compare:
+        regressions = compareResults(results, json.load(open(args.compare)), args.tolerance)
+        for regression in regressions:
+            print("[REGRESSION] " + regression)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,81 @@
+import argparse
+import os
+import sys
+import numpy as np
+
+# preprocessing modules are located in the repository root
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+from preprocessingArs import ArsLookup
+
+
+def referenceLookup(ars, postcode, city):
+    '''referenceLookup is the former lookup of transformLocation (boolean masks on the mapping table, first row wins)'''
+
+    # map official community key (ARS) for Regionalstatistik
+    if postcode:
+
+        # check, if we found a location
+        if not ars.loc[ars["postcode"] == postcode].empty:
+            arsVal = ars.loc[ars["postcode"] == postcode]
+        else:
+            arsVal = ars.loc[ars["cityname"] == city]
+
+    else:
+        arsVal = ars.loc[ars["cityname"] == city]
+
+    # convert offCommunityKey
+    if not arsVal.empty:
+        return arsVal.iloc[0]["ARS_region"]+arsVal.iloc[0]["ARS_governorate"]+arsVal.iloc[0]["ARS_county"]+arsVal.iloc[0]["ARS_city"]
+    return None
+
+
+def samplePairs(table, count, seed=0):
+
+    # variables
+    generator = np.random.default_rng(seed)
+    rows = table.iloc[generator.integers(0, len(table), count)]
+    others = table.iloc[generator.integers(0, len(table), count)]
+    pairs = []
+
+    # matching pairs, postcode with another city, city only, unknown postcode, city name in upper case
+    for index, (row, other) in enumerate(zip(rows.itertuples(), others.itertuples())):
+        pairs.append([(row.postcode, row.cityname), (row.postcode, other.cityname), (None, row.cityname),
+                      ("00000", row.cityname), (None, row.cityname.upper())][index % 5])
+
+    # return (postcode, city) list
+    return pairs
+
+
+def checkArs(lookup, count=500, seed=0):
+    '''checkArs compares ArsLookup (single and vectorized lookups) with the former lookup and returns the number of differences'''
+
+    # variables
+    pairs = samplePairs(lookup.table, count, seed)
+    expected = [referenceLookup(lookup.table, postcode, city) for postcode, city in pairs]
+    single = [lookup.lookup(postcode, city) for postcode, city in pairs]
+    many = lookup.lookupMany([postcode for postcode, _ in pairs], [city for _, city in pairs])
+    many = [key if isinstance(key, str) else None for key in many]
+
+    # former lookup found a key -> same key, otherwise the normalized city name may find one (counted, not a difference)
+    differences = [pair for pair, key, singleKey, manyKey in zip(pairs, expected, single, many) if singleKey != manyKey or (key is not None and singleKey != key)]
+    normalized = sum(1 for key, singleKey in zip(expected, single) if key is None and singleKey is not None)
+
+    # set a message
+    print("[INFO] {0} pairs, {1} differences, {2} additional keys by normalized city name {3}".format(len(pairs), len(differences), normalized, differences[:10] if differences else ""))
+
+    # return number of differences
+    return len(differences)
+
+
+if __name__ == "__main__":
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="compare ArsLookup with the former lookup on sampled postcode/city pairs")
+    parser.add_argument("--pairs", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # exit code 1, if the lookups differ
+    sys.exit(1 if checkArs(ArsLookup(os.path.join(root, "data/Postcode_ARS_mapping_table.csv")), args.pairs, args.seed) else 0)
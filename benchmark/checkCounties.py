@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import geopandas as gp
+import numpy as np
+
+# preprocessing modules are located in the repository root
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+from preprocessingArs import ArsLookup
+from preprocessingCounties import CountyResolver, countyPath, loadCounties
+from preprocessingGeocoder import OfflineGeocoder
+
+
+def randomPoints(counties, count, seed=0):
+
+    # uniform points in the bounding box of the county layer (incl. points outside of germany)
+    generator = np.random.default_rng(seed)
+    minx, miny, maxx, maxy = counties.total_bounds
+    x = generator.uniform(minx, maxx, count)
+    y = generator.uniform(miny, maxy, count)
+
+    # return points (GeoDataFrame)
+    return gp.GeoDataFrame(geometry=gp.points_from_xy(x, y), crs=counties.crs)
+
+
+def checkCounties(counties, count=200000, seed=0):
+    '''checkCounties compares the point-in-polygon lookup of CountyResolver with geopandas sjoin and returns the number of differences'''
+
+    # variables
+    points = randomPoints(counties, count, seed)
+    resolver = CountyResolver(counties)
+
+    # resolver without nearest county fallback (= within only)
+    index = resolver.resolve(points, maxDistance=0)
+
+    # reference: spatial join (points on a border are assigned to the first county)
+    joined = gp.sjoin(points, counties[["geometry"]], how="left", predicate="within")
+    joined = joined[~joined.index.duplicated()]
+    reference = joined["index_right"].fillna(-1).astype(int).values
+
+    # set a message
+    differences = int((index != reference).sum())
+    print("[INFO] {0} points, {1} in a county, {2} differences to sjoin".format(count, int((reference >= 0).sum()), differences))
+
+    # return number of differences
+    return differences
+
+
+def checkOfflinePoints(counties):
+    '''checkOfflinePoints resolves the point of every county (OfflineGeocoder) and returns the AGS, which do not resolve back to their county'''
+
+    # variables
+    geocoder = OfflineGeocoder(ArsLookup(os.path.join(root, "data/Postcode_ARS_mapping_table.csv")), counties)
+    keys = list(geocoder.points)
+    points = gp.GeoDataFrame(geometry=gp.points_from_xy([geocoder.points[ags][0] for ags in keys], [geocoder.points[ags][1] for ags in keys]), crs="EPSG:4326")
+
+    # point in polygon (without nearest county fallback)
+    index = CountyResolver(counties).resolve(points, maxDistance=0)
+    failures = [ags for ags, position in zip(keys, index) if position < 0 or counties["AGS"].iloc[position] != ags]
+
+    # set a message
+    print("[INFO] {0} offline county points, {1} outside of their county {2}".format(len(keys), len(failures), failures if failures else ""))
+
+    # return AGS of failed points (list)
+    return failures
+
+
+if __name__ == "__main__":
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="compare CountyResolver with geopandas sjoin on random points")
+    parser.add_argument("--points", type=int, default=200000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # variables
+    counties = loadCounties(os.path.join(root, countyPath))
+    differences = checkCounties(counties, args.points, args.seed)
+    failures = checkOfflinePoints(counties)
+
+    # exit code 1, if the lookups differ or an offline point is outside of its county
+    sys.exit(1 if differences or failures else 0)
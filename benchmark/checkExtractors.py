@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import sys
+
+# crawler modules are located in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawlerParser
+import webscraperFunctions as crawler
+from benchmarkExtractors import createSession, distinctCompanies, inCorpus
+from replayServer import ReplayServer, corpusDirectory
+
+# extractor output of the corpus (recorded with the find() based extractors before ExtractionPlan)
+expectedPath = os.path.join(corpusDirectory, "expected.json")
+
+
+def crawlCorpus(server, module=crawler):
+    '''crawlCorpus returns result list, job details and company data of the corpus (json compatible dict)'''
+
+    # variables
+    session = createSession(server, 1)
+    jobTitle = server.manifest["jobTitle"]
+
+    # same calls as the notebook (result pages, job details, company data)
+    jobList = [job for job in module.initJobSearch(jobTitle, session=session) if inCorpus(server, job["jobLink"])]
+    jobs = [module.getJobData(job["jobLink"], job["id"], session=session) for job in jobList]
+    companies = [module.getCompanyData(company, session=session) for company in distinctCompanies(jobList)]
+
+    # return data (json round trip -> same types as the stored output)
+    return json.loads(json.dumps({"results": jobList, "jobs": jobs, "companies": companies}, default=str, sort_keys=True))
+
+
+def compareOutput(output, expected):
+
+    # variables
+    differences = []
+
+    for kind in expected:
+
+        if len(output.get(kind, [])) != len(expected[kind]):
+            differences.append("{0}: {1} items instead of {2}".format(kind, len(output.get(kind, [])), len(expected[kind])))
+            continue
+
+        # differing fields per item
+        for index, (item, expectedItem) in enumerate(zip(output[kind], expected[kind])):
+            for key in sorted(set(item) | set(expectedItem)):
+                if item.get(key) != expectedItem.get(key):
+                    differences.append("{0}[{1}].{2}".format(kind, index, key))
+
+    # return differences (list)
+    return differences
+
+
+def checkExtractors(server, expected):
+    '''checkExtractors compares the extractor output of every parser backend (full and partial parsing) with the expected output'''
+
+    # variables
+    failures = 0
+
+    for parser in crawlerParser.availableParsers():
+        for partial in [False, True]:
+
+            crawlerParser.setParser(parser, partial)
+            differences = compareOutput(crawlCorpus(server), expected)
+            failures += len(differences)
+
+            # set a message
+            print("[INFO] {0}/{1}: {2} differences {3}".format(parser, "partial" if partial else "full", len(differences), differences[:10] if differences else ""))
+
+    # reset parser settings
+    crawlerParser.setParser("html.parser", True)
+
+    # return number of differences
+    return failures
+
+
+if __name__ == "__main__":
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="compare the extractor output on the corpus with the expected output")
+    parser.add_argument("--corpus", default=corpusDirectory)
+    parser.add_argument("--record", action="store_true", help="store the output of the current extractors as expected output")
+    args = parser.parse_args()
+
+    with ReplayServer(args.corpus) as server:
+
+        # record expected output
+        if args.record:
+            json.dump(crawlCorpus(server), open(os.path.join(args.corpus, "expected.json"), "w", encoding="utf-8"), indent=1, ensure_ascii=False, sort_keys=True)
+            sys.exit(0)
+
+        # exit code 1, if the output differs
+        sys.exit(1 if checkExtractors(server, json.load(open(os.path.join(args.corpus, "expected.json"), encoding="utf-8"))) else 0)
@@ -0,0 +1,202 @@
+import argparse
+import os
+import sys
+import tempfile
+import mongomock
+import numpy as np
+from geopy.location import Location
+
+# preprocessing modules are located in the repository root (mapping table and county layer are loaded by relative paths)
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+os.chdir(root)
+
+import preprocessingFunctions as core
+import preprocessingGeocoder
+import preprocessingRunner
+from preprocessingGeocoder import CachedGeocoder, GeocodingCache
+
+# source values (offline resolvable, ambiguous and remote locations, units, ranges, empty values)
+locations = ["Wiesbaden", "65183 Wiesbaden", "Landkreis München", "Kassel, Göttingen", "Frankfurt am Main", "Musterstadt", None,
+             {"country": "DE", "city": "Mainz", "postalCode": "55116"}, {"country": "DE", "city": "Köln", "street": "Domkloster"},
+             {"latitude": "50.08", "longitude": "8.24", "country": "DE"}]
+texts = [None, "", "<p>Wir sind ein DataTeam</p>", "Größe ÄÖÜ Straße", "camelCaseText (m/w/d)"]
+turnovers = [None, "", "1,5 Mrd. €", "250 Mio. Euro", "12.345.678 €", "keine Angabe"]
+workers = [None, "", "10.000+", "120 Mitarbeiter", "201 - 500 Mitarbeiter"]
+ratings = [None, {"overall": 4, "participation": {"1": 2, "5": 7}, "subrating": {"office": 3.5, "career": 4.1}}]
+
+
+class FixtureLocator:
+    '''Geocoder without network access -> the same address for every query (remote calls of notebook and runner are identical).'''
+
+    raw = {"lat": "50.08", "lon": "8.24", "address": {"country_code": "de", "city": "Wiesbaden", "postcode": "65183", "road": "Marktstraße", "house_number": "1"}}
+
+    def geocode(self, query, **kwargs):
+        return Location("Marktstraße 1, 65183 Wiesbaden", (50.08, 8.24), FixtureLocator.raw)
+
+    def reverse(self, query, **kwargs):
+        return Location("Marktstraße 1, 65183 Wiesbaden", (50.08, 8.24), FixtureLocator.raw)
+
+
+def createSource(database, companyCount, jobCount, seed=0):
+
+    # variables
+    generator = np.random.default_rng(seed)
+    pick = lambda values: values[generator.integers(0, len(values))]
+
+    # companies (some names are used by two companies, first one wins)
+    database["companies"].insert_many([{"id": index, "company": "Company {0}".format(index % (companyCount - 5)), "about": pick(texts),
+                                        "sectors": [{"sectorId": int(generator.integers(1, 40))}], "workers": pick(workers), "location": pick(locations),
+                                        "rating": pick(ratings), "turnover": pick(turnovers)} for index in range(companyCount)])
+
+    # jobs (some companies are unknown)
+    database["jobs"].insert_many([{"id": 8000000 + index, "company": "Company {0}".format(generator.integers(0, companyCount + 10)), "jobTitle": "Data Scientist",
+                                   "location": pick(locations), "contractType": "Feste Anstellung", "workType": "Vollzeit", "introduction": pick(texts),
+                                   "tasks": pick(texts), "applicantProfile": pick(texts), "companyOffer": pick(texts), "benefits": ["Homeoffice"]}
+                                  for index in range(jobCount)])
+
+
+def changeSource(database):
+
+    # update, delete and insert source documents (incremental run)
+    database["companies"].update_many({"id": {"$lt": 5}}, {"$set": {"turnover": "3 Mio. €"}})
+    database["jobs"].update_many({"id": {"$lt": 8000010}}, {"$set": {"tasks": "NeueAufgaben"}})
+    database["jobs"].delete_many({"id": {"$gte": 8000010, "$lt": 8000015}})
+    database["companies"].insert_one({"id": 10000, "company": "Company 10000", "about": "Neu", "sectors": None, "workers": None,
+                                      "location": "Wiesbaden", "rating": None, "turnover": None})
+
+
+def notebookPreprocessing(database):
+    '''notebookPreprocessing is the preprocessing of preprocessing.ipynb (document loop, delete_many + insert_many)'''
+
+    # global variables
+    newCompanies = []
+    newJobs = []
+
+    # process every document from database -> doc is returned from cursor
+    for document in database["companies"].find({}):
+
+        # create empty structure
+        data = dict.fromkeys(["_id", "companyId", "companyName", "companyDescription", "sectors", "workers", "location", "rating", "turnover"])
+
+        # move _id (ObjectID for identifying document) and other values
+        data["_id"] = document.get("_id")
+        data["companyId"] = document.get("id")
+        data["companyName"] = document.get("company")
+        data["companyDescription"] = core.transformText(document.get("about"))
+        data["sectors"] = core.transformSectors(document.get("sectors"))
+        data["workers"] = core.transformWorkers(document.get("workers"))
+        data["location"] = core.transformLocation(document.get("location"), document.get("company"))
+        data["rating"] = core.transformRating(document.get("rating"))
+        data["turnover"] = core.transformTurnover(document.get("turnover"))
+
+        # append new structure to newCompanies list
+        newCompanies.append(data)
+
+    # delete data if collection has data
+    database["pCompany"].delete_many({})
+    database["pCompany"].insert_many(newCompanies)
+
+    # process every document from database -> doc is returned from cursor
+    for document in database["jobs"].find({}):
+
+        # create empty structure
+        data = dict.fromkeys(["_id", "jobId", "company", "companyId", "title", "location", "contractType",
+                              "workType", "introduction", "tasks", "applicantProfile", "companyOffer", "benefits"])
+
+        # move _id (ObjectID for identifying document) and other values
+        data["_id"] = document.get("_id")
+        data["jobId"] = document.get("id")
+        data["company"] = document.get("company")
+        data["companyId"] = core.determineCompanyId(document.get("company"))
+        data["title"] = document.get("jobTitle")
+        data["location"] = core.transformLocation(document.get("location"), document.get("company"))
+        data["contractType"] = document.get("contractType")
+        data["workType"] = document.get("workType")
+        data["introduction"] = core.transformText(document.get("introduction"))
+        data["tasks"] = core.transformText(document.get("tasks"))
+        data["applicantProfile"] = core.transformText(document.get("applicantProfile"))
+        data["companyOffer"] = core.transformText(document.get("companyOffer"))
+        data["benefits"] = document.get("benefits")
+
+        # append new structure to newJobs list
+        newJobs.append(data)
+
+    # delete data if collection has data
+    database["pJobs"].delete_many({})
+    database["pJobs"].insert_many(newJobs)
+
+
+def compareCollections(database, reference):
+
+    # variables
+    differences = []
+
+    for name in ["pCompany", "pJobs"]:
+
+        # documents by _id (same source _ids in both databases)
+        documents = {document["_id"]: document for document in database[name].find({})}
+        expected = {document["_id"]: document for document in reference[name].find({})}
+
+        differences += ["{0}: {1} missing".format(name, id) for id in expected if id not in documents]
+        differences += ["{0}: {1} not expected".format(name, id) for id in documents if id not in expected]
+        differences += ["{0}: {1}.{2}".format(name, id, key) for id in expected if id in documents
+                        for key in sorted(set(expected[id]) | set(documents[id])) if repr(expected[id].get(key)) != repr(documents[id].get(key))]
+
+    # return differences (list)
+    return differences
+
+
+def checkRunner(companyCount=200, jobCount=1000, batchSize=50, workers=2, seed=0):
+    '''checkRunner compares runPreprocessing (full and incremental run) with the notebook loop on mongomock databases and returns the number of differences'''
+
+    # variables
+    failures = 0
+    reference = mongomock.MongoClient()
+    database = mongomock.MongoClient()["stepstone-data"]
+
+    # determineCompanyId of the notebook uses the shared client, geocoding without network (temporary cache)
+    core.mongoClient = reference
+    preprocessingGeocoder.sharedGeocoder = CachedGeocoder(cache=GeocodingCache(os.path.join(tempfile.mkdtemp(), "geocoding.sqlite")), geoLocator=FixtureLocator(), minDelay=0)
+
+    # source documents
+    createSource(reference["stepstone-data"], companyCount, jobCount, seed)
+
+    for run, incremental in [("full", False), ("incremental", True)]:
+
+        # changed source documents for the incremental run
+        if incremental:
+            changeSource(reference["stepstone-data"])
+
+        # same source documents (incl. _id) in both databases
+        for name in ["companies", "jobs"]:
+            database[name].delete_many({})
+            database[name].insert_many(list(reference["stepstone-data"][name].find({})))
+
+        notebookPreprocessing(reference["stepstone-data"])
+        preprocessingRunner.runPreprocessing(database, batchSize=batchSize, workers=workers, incremental=incremental)
+
+        differences = compareCollections(database, reference["stepstone-data"])
+        failures += len(differences)
+
+        # set a message
+        print("[INFO] {0} run: {1} companies, {2} jobs, {3} differences {4}".format(
+            run, database["pCompany"].count_documents({}), database["pJobs"].count_documents({}), len(differences), differences[:10] if differences else ""))
+
+    # return number of differences
+    return failures
+
+
+if __name__ == "__main__":
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="compare runPreprocessing with the notebook loop (mongomock)")
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # exit code 1, if the documents differ
+    sys.exit(1 if checkRunner(args.companies, args.jobs, args.batch_size, args.workers, args.seed) else 0)
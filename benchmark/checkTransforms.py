@@ -0,0 +1,82 @@
+import argparse
+import os
+import sys
+import numpy as np
+
+# preprocessing modules are located in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import preprocessingFunctions as core
+
+# edge cases of the scalar transformations (None, empty, units, ranges, camelcase, umlauts)
+edgeCases = {
+    "text": [None, "", "   ", "\n\t", "HalloWelt", "camelCaseText", "Data Scientist (m/w/d)", "foo-bar_baz 123", "Größe ÄÖÜ Straße",
+             "Größe", "ÄrgerÜber", "<p>Wir bieten:</p><ul><li>Homeoffice</li></ul>", "  Leerzeichen  am Rand  "],
+    "turnover": [None, "", "1,5 Mrd. €", "250 Mio. Euro", "10 Millionen", "2,75 Milliarden", "12.345.678 €", "keine Angabe",
+                 "5 - 10 Mio. €", "1,234 Mio", "mio", "0", "1,5,7 Mio", "ca. 3 MRD"],
+    "workers": [None, "", "10.000+", "120 Mitarbeiter", "1001-5000", "201 - 500 Mitarbeiter", "-", "abc", "5-", "-5", "1-2-3"],
+    "sectors": [None, [], [{"sectorId": 1}], [{"sectorId": 1}, {"sectorId": 27}]],
+    "rating": [None, {}, {"overall": 4, "participation": {"1": 2, "5": 7}, "subrating": {"office": 3.5, "career": 4.1}},
+               {"overall": None, "participation": {}, "subrating": {}}]}
+
+# scalar function and Series version per transformation
+transforms = {
+    "text": (core.transformText, core.transformTextSeries),
+    "turnover": (core.transformTurnover, core.transformTurnoverSeries),
+    "workers": (core.transformWorkers, core.transformWorkersSeries),
+    "sectors": (core.transformSectors, core.transformSectorsSeries),
+    "rating": (core.transformRating, core.transformRatingSeries)}
+
+# characters of random strings (digits, separators, units, umlauts)
+alphabet = list("0123456789,.-+ MmIiOoRrDdAaLlNnEeKk_/()äöüÄÖÜß\t")
+
+
+def randomStrings(count, seed=0):
+
+    # random strings (length 0-24) from alphabet
+    generator = np.random.default_rng(seed)
+    return ["".join(generator.choice(alphabet, generator.integers(0, 25))) for _ in range(count)]
+
+
+def compareTransform(name, values):
+
+    # variables
+    scalar, series = transforms[name]
+    expected = [scalar(value) for value in values]
+    output = list(series(values))
+
+    # repr distinguishes types (1 and 1.0, None and NaN)
+    return [value for value, a, b in zip(values, expected, output) if repr(a) != repr(b)] + (["length"] if len(output) != len(expected) else [])
+
+
+def checkTransforms(count=2000, seed=0):
+    '''checkTransforms compares the Series transformations with the scalar functions element by element and returns the number of differences'''
+
+    # variables
+    failures = 0
+    strings = randomStrings(count, seed)
+
+    for name in transforms:
+
+        # edge cases + random strings (string transformations only)
+        values = edgeCases[name] + (strings if name in ["text", "turnover", "workers"] else [])
+        differences = compareTransform(name, values)
+        failures += len(differences)
+
+        # set a message
+        print("[INFO] {0}: {1} values, {2} differences {3}".format(name, len(values), len(differences), differences[:10] if differences else ""))
+
+    # return number of differences
+    return failures
+
+
+if __name__ == "__main__":
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="compare the Series transformations with the scalar functions")
+    parser.add_argument("--values", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # exit code 1, if the transformations differ
+    sys.exit(1 if checkTransforms(args.values, args.seed) else 0)
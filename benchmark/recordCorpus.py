@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+import urllib.parse
+
+# crawler modules are located in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import webscraperFunctions as crawler
+from replayServer import corpusDirectory
+
+
+def recordCorpus(jobTitle, directory=corpusDirectory, resultPages=2, jobs=10, companies=5):
+    '''recordCorpus stores result, job and company pages from stepstone.de as replay corpus'''
+
+    # variables
+    manifest = {"host": "www.stepstone.de", "jobTitle": jobTitle, "pages": {}}
+    jobList = []
+    os.makedirs(directory, exist_ok=True)
+
+    def record(uri, name):
+
+        # store raw page (bytes as received)
+        r = crawler.getResponse(uri)
+        open(os.path.join(directory, name), "wb").write(r.content)
+
+        # manifest key = path + query
+        parts = urllib.parse.urlsplit(uri)
+        manifest["pages"][parts.path + ("?" + parts.query if parts.query else "")] = name
+
+        # return html
+        return r.text
+
+    # result pages
+    url = "https://www.stepstone.de/5/ergebnisliste.html?what={0}".format(urllib.parse.quote(jobTitle))
+    for page in range(resultPages):
+        text = record(url + ("&of={0}".format(page * 25) if page else ""), "result-{0}.html".format(page * 25))
+        jobList.extend(crawler.getResultData(crawler.parseHtml(text, "result")))
+
+    # job pages (links of other jobs are not part of corpus)
+    for index, job in enumerate(jobList[:jobs]):
+        record(job["jobLink"], "job-{0}.html".format(index))
+
+    # company pages (jobs page + profile page)
+    links = list(dict.fromkeys([job["companyLink"] for job in jobList]))[:companies]
+    for index, link in enumerate(links):
+        text = record(link, "company-{0}-jobs.html".format(index))
+        company = crawler.extractCompanyData({"company": None, "companyLink": link}, crawler.parseHtml(text, "company"))
+        if company["linkProfile"]:
+            record(company["linkProfile"], "company-{0}-profile.html".format(index))
+
+    # store manifest
+    json.dump(manifest, open(os.path.join(directory, "manifest.json"), "w", encoding="utf-8"), indent=2)
+    print("[INFO] recorded {0} pages to {1}".format(len(manifest["pages"]), directory))
+
+
+if __name__ == "__main__":
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="record a replay corpus from stepstone.de")
+    parser.add_argument("jobTitle")
+    parser.add_argument("--directory", default=corpusDirectory)
+    parser.add_argument("--result-pages", type=int, default=2)
+    parser.add_argument("--jobs", type=int, default=10)
+    parser.add_argument("--companies", type=int, default=5)
+    args = parser.parse_args()
+
+    recordCorpus(args.jobTitle, args.directory, args.result_pages, args.jobs, args.companies)
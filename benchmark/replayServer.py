@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+from requests.adapters import HTTPAdapter
+
+# default corpus (next to this file)
+corpusDirectory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+class ReplayServer:
+    '''Local stand-in for stepstone.de -> serves recorded pages of a corpus (manifest: path + query -> file).'''
+
+    def __init__(self, directory=corpusDirectory, latency=0.0, port=0):
+
+        # assign variables
+        self.directory = directory
+        self.latency = latency
+        self.manifest = json.load(open(os.path.join(directory, "manifest.json"), encoding="utf-8"))
+        self.pages = {}
+
+        # load pages once (server should not be the bottleneck)
+        for path, file in self.manifest["pages"].items():
+            if file not in self.pages:
+                self.pages[file] = open(os.path.join(directory, file), "rb").read()
+
+        # create server
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{0}".format(self.server.server_address[1])
+
+    def handler(self):
+
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+
+                # simulated network latency
+                if replay.latency:
+                    sleep(replay.latency)
+
+                file = replay.manifest["pages"].get(self.path)
+
+                # unknown page
+                if file is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                # send recorded page
+                body = replay.pages[file]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+
+        # serve in background thread
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class ReplayAdapter(HTTPAdapter):
+    '''Transport adapter which redirects requests for the recorded host to the replay server.'''
+
+    def __init__(self, target, **kwargs):
+
+        # assign variables
+        self.target = urllib.parse.urlsplit(target)
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+
+        # replace scheme + host, keep path + query
+        parts = urllib.parse.urlsplit(request.url)
+        request.url = urllib.parse.urlunsplit((self.target.scheme, self.target.netloc, parts.path, parts.query, ""))
+
+        return super().send(request, **kwargs)
+
+
+def replaySession(server, session):
+    '''replaySession mounts the replay adapter for stepstone.de on a CrawlerSession'''
+
+    adapter = ReplayAdapter(server.url, pool_connections=10, pool_maxsize=64)
+    session.session.mount("https://" + server.manifest["host"], adapter)
+    session.adapter = adapter
+
+    # return session
+    return session
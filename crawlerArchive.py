@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+import webscraperFunctions as crawler
+
+# zstandard is optional (zlib is used, if it is not installed)
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def compress(content, codec):
+
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=10).compress(content)
+    return zlib.compress(content, 9)
+
+
+def decompress(payload, codec):
+
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return zlib.decompress(payload)
+
+
+class PageArchive:
+    '''Append-only archive of raw pages (WARC-like segments, zstd/zlib compressed, deduplicated by content hash).'''
+
+    def __init__(self, directory=".cache/archive", segmentSize=256 * 1024 * 1024):
+
+        # assign variables
+        self.directory = directory
+        self.segmentSize = segmentSize
+        self.codec = "zstd" if zstandard else "deflate"
+        self.lock = threading.Lock()
+
+        # create directory
+        os.makedirs(directory, exist_ok=True)
+
+        # index: content hash -> segment, offset, length
+        self.connection = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS records (sha256 TEXT PRIMARY KEY, segment TEXT, offset INTEGER,
+                                   length INTEGER, codec TEXT, uri TEXT, storedAt TEXT, encoding TEXT)""")
+
+        # add encoding column to index of older archives (records without encoding are utf-8)
+        if "encoding" not in [column[1] for column in self.connection.execute("PRAGMA table_info(records)")]:
+            self.connection.execute("ALTER TABLE records ADD COLUMN encoding TEXT")
+        self.connection.commit()
+
+        # continue with last segment
+        segments = sorted(file for file in os.listdir(directory) if file.startswith("segment-"))
+        self.segment = segments[-1] if segments else "segment-00000.warc"
+
+    def store(self, uri, content, encoding="utf-8"):
+        '''store appends a page (bytes, charset of response) to the archive and returns the reference (existing reference, if content is known)'''
+
+        # content hash identifies the record
+        sha256 = hashlib.sha256(content).hexdigest()
+
+        with self.lock:
+
+            # content already archived
+            row = self.connection.execute("SELECT segment, offset, length FROM records WHERE sha256 = ?", (sha256,)).fetchone()
+            if row:
+                return {"sha256": sha256, "segment": row[0], "offset": row[1], "length": row[2]}
+
+            # start new segment, if current segment is full
+            path = os.path.join(self.directory, self.segment)
+            if os.path.exists(path) and os.path.getsize(path) >= self.segmentSize:
+                self.segment = "segment-{0:05d}.warc".format(int(self.segment[8:13]) + 1)
+                path = os.path.join(self.directory, self.segment)
+
+            # create record (header + compressed payload)
+            payload = compress(content, self.codec)
+            storedAt = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            header = ("WARC/1.0\r\nWARC-Type: resource\r\nWARC-Record-ID: <urn:sha256:{0}>\r\nWARC-Target-URI: {1}\r\nWARC-Date: {2}\r\n"
+                      "Content-Type: text/html; charset={3}\r\nContent-Encoding: {4}\r\nContent-Length: {5}\r\n\r\n").format(sha256, uri, storedAt, encoding, self.codec, len(payload))
+
+            # append record to segment
+            with open(path, "ab") as segment:
+                offset = segment.tell() + len(header.encode("utf-8"))
+                segment.write(header.encode("utf-8"))
+                segment.write(payload)
+                segment.write(b"\r\n\r\n")
+
+            self.connection.execute("INSERT INTO records (sha256, segment, offset, length, codec, uri, storedAt, encoding) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (sha256, self.segment, offset, len(payload), self.codec, uri, storedAt, encoding))
+            self.connection.commit()
+
+            # return reference (segment of this record, before another store starts a new segment)
+            return {"sha256": sha256, "segment": self.segment, "offset": offset, "length": len(payload)}
+
+    def load(self, reference):
+        '''load returns the raw page (bytes) of a reference'''
+
+        # codec of record
+        with self.lock:
+            row = self.connection.execute("SELECT codec FROM records WHERE sha256 = ?", (reference["sha256"],)).fetchone()
+        codec = row[0] if row else self.codec
+
+        # read payload
+        with open(os.path.join(self.directory, reference["segment"]), "rb") as segment:
+            segment.seek(reference["offset"])
+            payload = segment.read(reference["length"])
+
+        # return content
+        return decompress(payload, codec)
+
+    def text(self, reference):
+        '''text returns the page (str) of a reference, decoded with the charset of the response'''
+
+        # charset of record
+        with self.lock:
+            row = self.connection.execute("SELECT encoding FROM records WHERE sha256 = ?", (reference["sha256"],)).fetchone()
+        encoding = row[0] if row and row[0] else "utf-8"
+
+        # return content (same error handling as the parser processes)
+        return self.load(reference).decode(encoding, errors="replace")
+
+    def close(self):
+        self.connection.close()
+
+
+def reparseJob(archive, job):
+    '''reparseJob extracts a job again from its archived page (no request)'''
+
+    soup = crawler.parseHtml(archive.text(job["store"]["page"]), "job")
+
+    # return job dictionary (incl. html of all sections)
+    return crawler.extractJobData(soup, job["link"], job["id"])
+
+
+def reparseCompany(archive, company):
+    '''reparseCompany extracts a company again from its archived pages (no request)'''
+
+    soup = crawler.parseHtml(archive.text(company["store"]["jobs"]), "company")
+    reparsed = crawler.extractCompanyData({"company": company["company"], "companyLink": company["linkJobs"]}, soup)
+
+    # profile page
+    if "profile" in company["store"]:
+        soupProfile = crawler.parseHtml(archive.text(company["store"]["profile"]), "company")
+        crawler.extractCompanyProfile(reparsed, soupProfile)
+
+    # return company dictionary (incl. json)
+    return reparsed
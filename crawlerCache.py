@@ -0,0 +1,182 @@
+import os
+import sqlite3
+import threading
+import urllib.parse
+import zlib
+import requests
+from time import time
+
+
+def normalizeUrl(uri):
+
+    # split url into components
+    parts = urllib.parse.urlsplit(uri)
+
+    # scheme + host are case insensitive, query parameters are sorted, fragment is dropped
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    path = parts.path if parts.path else "/"
+
+    # return normalized url
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+class ResponseCache:
+    '''Persistent on-disk response cache (compressed, TTL, size-bounded LRU, ETag/Last-Modified revalidation).'''
+
+    def __init__(self, path=".cache/responses.sqlite", ttl=86400, maxSize=512 * 1024 * 1024):
+
+        # assign variables
+        self.path = path
+        self.ttl = ttl
+        self.maxSize = maxSize
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+        # create directory
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # connect to database (shared between threads, access is serialized by lock)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                       url TEXT PRIMARY KEY, status INTEGER, encoding TEXT, etag TEXT, lastModified TEXT,
+                                       body BLOB, size INTEGER, storedAt REAL, accessedAt REAL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessedAt)")
+        self.connection.commit()
+
+    def lookup(self, uri):
+        '''lookup returns the cache entry for an url (or None)'''
+
+        with self.lock:
+            row = self.connection.execute("SELECT status, encoding, etag, lastModified, body, storedAt FROM responses WHERE url = ?",
+                                          (normalizeUrl(uri),)).fetchone()
+
+        # no entry found
+        if not row:
+            return None
+
+        # return entry (dict)
+        return dict(zip(["status", "encoding", "etag", "lastModified", "body", "storedAt"], row))
+
+    def store(self, uri, response):
+        '''store saves a response (compressed) and evicts least recently used entries'''
+
+        # compress content
+        body = zlib.compress(response.content)
+        now = time()
+
+        with self.lock:
+
+            # insert or replace entry
+            self.connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                    (normalizeUrl(uri), response.status_code, response.encoding, response.headers.get("ETag"),
+                                     response.headers.get("Last-Modified"), body, len(body), now, now))
+
+            # evict entries until cache fits into maxSize
+            total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+            if total > self.maxSize:
+                for url, size in self.connection.execute("SELECT url, size FROM responses ORDER BY accessedAt").fetchall():
+                    if total <= self.maxSize:
+                        break
+                    self.connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+                    total -= size
+
+            self.connection.commit()
+
+    def touch(self, uri, refresh=False):
+        '''touch updates access time (and storage time, if entry was revalidated)'''
+
+        now = time()
+
+        with self.lock:
+            if refresh:
+                self.connection.execute("UPDATE responses SET accessedAt = ?, storedAt = ? WHERE url = ?", (now, now, normalizeUrl(uri)))
+            else:
+                self.connection.execute("UPDATE responses SET accessedAt = ? WHERE url = ?", (now, normalizeUrl(uri)))
+            self.connection.commit()
+
+    def get(self, fetch, uri, **kwargs):
+        '''get returns a response from cache or performs a (conditional) request with the given fetch function'''
+
+        # variables
+        entry = self.lookup(uri)
+        headers = dict(kwargs.pop("headers", None) or {})
+
+        if entry:
+
+            # entry is fresh -> no request required
+            if time() - entry["storedAt"] < self.ttl:
+                self.count("hits")
+                self.touch(uri)
+                return self.toResponse(uri, entry)
+
+            # entry is stale -> revalidate, if server provided validators
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["lastModified"]:
+                headers["If-Modified-Since"] = entry["lastModified"]
+
+        # query data
+        response = fetch(uri, headers=headers, **kwargs)
+
+        # not modified -> use cached entry
+        if entry and response.status_code == 304:
+            self.count("revalidated")
+            self.touch(uri, refresh=True)
+            return self.toResponse(uri, entry, fromCache=False)
+
+        # only successful responses are cached
+        self.count("misses")
+        if response.status_code == 200:
+            self.store(uri, response)
+
+        # return response
+        response.fromCache = False
+        return response
+
+    def count(self, counter):
+
+        # counters are shared between threads
+        with self.lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def toResponse(self, uri, entry, fromCache=True):
+
+        # create response object from cache entry (fromCache = server was not contacted)
+        response = requests.Response()
+        response.url = uri
+        response.status_code = entry["status"]
+        response.encoding = entry["encoding"]
+        response._content = zlib.decompress(entry["body"])
+        response.fromCache = fromCache
+
+        # add validators
+        if entry["etag"]:
+            response.headers["ETag"] = entry["etag"]
+        if entry["lastModified"]:
+            response.headers["Last-Modified"] = entry["lastModified"]
+
+        # return response
+        return response
+
+    def statistics(self):
+        '''statistics returns hit/miss statistics and cache size'''
+
+        with self.lock:
+            entries, size = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+        # return statistics (dict)
+        return {"hits": self.hits, "misses": self.misses, "revalidated": self.revalidated, "entries": entries, "size": size}
+
+    def clear(self):
+        '''clear deletes all cache entries'''
+
+        with self.lock:
+            self.connection.execute("DELETE FROM responses")
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
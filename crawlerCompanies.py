@@ -0,0 +1,147 @@
+import json
+import os
+import re as regex
+import sqlite3
+import threading
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import time
+import webscraperFunctions as crawler
+
+
+def canonicalCompanyKey(companyLink):
+
+    # company links contain the company id at the end of the slug (/cmp/de/beispiel-gmbh-12345/jobs.html)
+    match = regex.search(r"/cmp/[a-z]{2}/[^/]*?-(\d+)(?:/|$)", companyLink)
+    if match:
+        return match.group(1)
+
+    # fallback: normalized link (no query, no fragment, lower case)
+    parts = urllib.parse.urlsplit(companyLink)
+    return urllib.parse.urlunsplit(("https", parts.netloc.lower(), parts.path.lower().rstrip("/"), "", ""))
+
+
+class CompanyFetcher:
+    '''Fetches every company only once -> canonical company key, in-flight request coalescing and TTL cache across crawls.'''
+
+    def __init__(self, session=None, path=".cache/companies.sqlite", ttl=7 * 86400, archive=None):
+
+        # assign variables
+        self.session = session
+        self.archive = archive
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.inFlight = {}
+        self.stats = {"fetched": 0, "coalesced": 0, "cached": 0}
+
+        # create directory
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # connect to database (shared between threads, access is serialized by lock)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS companies (key TEXT PRIMARY KEY, record TEXT, storedAt REAL)")
+        self.connection.commit()
+
+    def cached(self, key):
+
+        # caller holds lock
+        row = self.connection.execute("SELECT record, storedAt FROM companies WHERE key = ?", (key,)).fetchone()
+
+        # return record, if not expired
+        return json.loads(row[0]) if row and time() - row[1] < self.ttl else None
+
+    def lookup(self, key):
+
+        with self.lock:
+            return self.cached(key)
+
+    def store(self, key, company):
+
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO companies VALUES (?, ?, ?)", (key, json.dumps(company), time()))
+            self.connection.commit()
+
+    def fetch(self, companyDict):
+        '''fetch returns the company data (from cache, from a running request or by a new request)'''
+
+        key = canonicalCompanyKey(companyDict["companyLink"])
+
+        # use cached record or join running request for the same company (one atomic step, the owner stores before it leaves)
+        with self.lock:
+            company = self.cached(key)
+            future = self.inFlight.get(key)
+            owner = company is None and future is None
+            if owner:
+                future = self.inFlight[key] = Future()
+
+        if company:
+            self.count("cached")
+            return company
+
+        if not owner:
+            self.count("coalesced")
+            return future.result()
+
+        # fetch company data and pass it to waiting threads
+        try:
+            company = crawler.getCompanyData(companyDict, session=self.session, archive=self.archive)
+            self.count("fetched")
+            self.store(key, company)
+            future.set_result(company)
+            return company
+        except Exception as err:
+            future.set_exception(err)
+            raise
+        finally:
+            with self.lock:
+                del self.inFlight[key]
+
+    def getCompanyData(self, companyList, workers=4):
+        '''getCompanyData returns one company record per canonical company (all names are stored as aliases)'''
+
+        # variables
+        companies = {}
+        aliases = {}
+
+        # group names by canonical key
+        for companyDict in companyList:
+            key = canonicalCompanyKey(companyDict["companyLink"])
+            aliases.setdefault(key, [])
+            if companyDict["company"] not in aliases[key]:
+                aliases[key].append(companyDict["company"])
+            companies.setdefault(key, companyDict)
+
+        def fetchCompany(key):
+            try:
+                company = self.fetch(companies[key])
+            except Exception as err:
+                # items, occuring here have to processed manually
+                print(companies[key])
+                print(err)
+                return None
+
+            # copy (the record is shared with coalesced requests)
+            return dict(company, aliases=aliases[key])
+
+        # fetch distinct companies
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(fetchCompany, list(companies)))
+
+        # return company list
+        return [company for company in results if company]
+
+    def count(self, counter):
+
+        # counters are shared between threads
+        with self.lock:
+            self.stats[counter] += 1
+
+    def statistics(self):
+        '''statistics returns number of fetched, coalesced and cached companies'''
+
+        with self.lock:
+            return dict(self.stats)
+
+    def close(self):
+        self.connection.close()
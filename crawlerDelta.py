@@ -0,0 +1,135 @@
+import hashlib
+from datetime import datetime
+from pymongo import ReplaceOne
+import webscraperFunctions as crawler
+
+
+def resultFingerprint(job):
+
+    # fingerprint over result page fields (changes, if posting was edited/republished)
+    content = "|".join([str(job.get(key)) for key in ["title", "jobLink", "company", "companyLink"]])
+
+    # return fingerprint (str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def loadKnownJobs(collection):
+
+    # index on job id (the whole index is read by a single query)
+    collection.create_index("id")
+
+    # return dict id -> fingerprint + queries for all jobs, which are not expired
+    return {doc["id"]: {"fingerprint": doc.get("fingerprint"), "queries": doc.get("queries", [])}
+            for doc in collection.find({"expired": {"$ne": True}}, {"id": 1, "fingerprint": 1, "queries": 1, "_id": 0})}
+
+
+def jobQueries(job, queries):
+
+    # multi query results carry their job titles, single query results belong to the crawled query
+    return job.get("queries") or queries
+
+
+def splitDelta(jobList, knownJobs, queries):
+
+    # variables
+    delta = {"new": [], "changed": [], "unchanged": [], "dropped": {}, "expired": []}
+    returned = {}
+
+    # classify every result (ids are unique in delta)
+    for job in jobList:
+
+        if job["id"] in returned:
+            returned[job["id"]].update(jobQueries(job, queries))
+            continue
+        returned[job["id"]] = set(jobQueries(job, queries))
+
+        if job["id"] not in knownJobs:
+            delta["new"].append(job)
+        elif knownJobs[job["id"]]["fingerprint"] != resultFingerprint(job):
+            delta["changed"].append(job)
+        else:
+            delta["unchanged"].append(job)
+
+    # known jobs of the crawled queries, which are not in their result list anymore
+    for id, known in knownJobs.items():
+
+        # jobs of older crawls (without queries) are expired, if they are not in the result list
+        if not known["queries"]:
+            if id not in returned:
+                delta["expired"].append(id)
+            continue
+
+        missing = set(known["queries"]) & set(queries) - returned.get(id, set())
+        if not missing:
+            continue
+
+        # expired: not found for any of its queries, dropped: still found for other queries
+        if id not in returned and missing == set(known["queries"]):
+            delta["expired"].append(id)
+        else:
+            delta["dropped"][id] = sorted(missing)
+
+    # return delta (dict)
+    return delta
+
+
+def crawlDelta(jobList, collection, queries=None, session=None):
+    '''crawlDelta fetches details for new/changed jobs only and marks vanished jobs as expired (jobList has to be the complete
+    search result of queries -> jobs of other job titles are not expired). queries can be omitted for initMultiJobSearch results.'''
+
+    # crawled queries (multi query results carry their job titles)
+    if queries is None:
+        queries = sorted(set(query for job in jobList for query in job.get("queries", [])))
+    if not queries:
+        raise ValueError("crawlDelta needs the crawled job titles (queries) to decide which jobs are expired")
+
+    # variables
+    jobData = []
+    now = datetime.now()
+    knownJobs = loadKnownJobs(collection)
+
+    # compare result list with known jobs
+    delta = splitDelta(jobList, knownJobs, queries)
+
+    # set a message
+    print("[INFO] delta: {0} new, {1} changed, {2} unchanged, {3} expired".format(
+        len(delta["new"]), len(delta["changed"]), len(delta["unchanged"]), len(delta["expired"])))
+
+    # fetch details for new and changed jobs only
+    for job in delta["new"] + delta["changed"]:
+        try:
+            data = crawler.getJobData(job["jobLink"], job["id"], session=session)
+        except:
+            print(job)
+            continue
+
+        # add delta information (queries of other job titles are kept)
+        data["fingerprint"] = resultFingerprint(job)
+        data["queries"] = sorted(set(knownJobs.get(job["id"], {}).get("queries", [])) - set(delta["dropped"].get(job["id"], [])) | set(jobQueries(job, queries)))
+        data["expired"] = False
+        data["lastSeen"] = now
+
+        jobData.append(data)
+
+    # store new and changed jobs (replace existing document)
+    if jobData:
+        collection.bulk_write([ReplaceOne({"id": data["id"]}, data, upsert=True) for data in jobData], ordered=False)
+
+    # unchanged jobs are still online (for the queries, which returned them)
+    for query in queries:
+        ids = [job["id"] for job in delta["unchanged"] if query in jobQueries(job, queries)]
+        if ids:
+            collection.update_many({"id": {"$in": ids}}, {"$set": {"lastSeen": now}, "$addToSet": {"queries": query}})
+
+    # jobs, which are not returned for some of their queries anymore
+    for id, missing in delta["dropped"].items():
+        if id not in [data["id"] for data in jobData]:
+            collection.update_one({"id": id}, {"$pullAll": {"queries": missing}})
+
+    # mark vanished jobs as expired
+    if delta["expired"]:
+        collection.update_many({"id": {"$in": delta["expired"]}}, {"$set": {"expired": True, "expiredAt": now}})
+
+    # return fetched jobs and delta
+    delta["jobData"] = jobData
+    return delta
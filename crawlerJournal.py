@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+import threading
+import urllib.parse
+from time import time
+import webscraperFunctions as crawler
+
+
+class CrawlJournal:
+    '''Append-only crawl journal (SQLite) -> frontier, completed urls and failures are recorded to resume/retry a crawl.'''
+
+    def __init__(self, path=".cache/journal.sqlite"):
+
+        # assign variables
+        self.path = path
+        self.lock = threading.Lock()
+
+        # create directory
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # connect to database (shared between threads, access is serialized by lock)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS frontier (kind TEXT, key TEXT, payload TEXT, addedAt REAL, PRIMARY KEY (kind, key))")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS events (kind TEXT, key TEXT, status TEXT, reason TEXT, result TEXT, at REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_events_key ON events (kind, key)")
+        self.connection.commit()
+
+    def addFrontier(self, kind, items):
+        '''addFrontier adds (key, payload) items to the frontier (known keys are ignored)'''
+
+        with self.lock:
+            self.connection.executemany("INSERT OR IGNORE INTO frontier VALUES (?, ?, ?, ?)",
+                                        [(kind, key, json.dumps(payload), time()) for key, payload in items])
+            self.connection.commit()
+
+    def frontier(self, kind):
+        '''frontier returns all (key, payload) items in insertion order'''
+
+        with self.lock:
+            rows = self.connection.execute("SELECT key, payload FROM frontier WHERE kind = ? ORDER BY rowid", (kind,)).fetchall()
+
+        # return list of tuples
+        return [(key, json.loads(payload)) for key, payload in rows]
+
+    def record(self, kind, key, status, reason=None, result=None):
+        '''record appends an event (status: done/failed)'''
+
+        with self.lock:
+            self.connection.execute("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                                    (kind, key, status, reason, json.dumps(result) if result is not None else None, time()))
+            self.connection.commit()
+
+    def states(self, kind):
+        '''states returns the latest event per key (key -> dict with status, reason, result)'''
+
+        with self.lock:
+            rows = self.connection.execute("""SELECT key, status, reason, result FROM events WHERE rowid IN
+                                              (SELECT MAX(rowid) FROM events WHERE kind = ? GROUP BY key)""", (kind,)).fetchall()
+
+        # return dict
+        return {key: {"status": status, "reason": reason, "result": json.loads(result) if result else None} for key, status, reason, result in rows}
+
+    def failures(self, kind):
+        '''failures returns key -> reason for all items, which failed last time'''
+        return {key: state["reason"] for key, state in self.states(kind).items() if state["status"] == "failed"}
+
+    def close(self):
+        self.connection.close()
+
+
+def runJournaled(journal, kind, items, keyFunction, fetchFunction, retryFailed=False):
+    '''runJournaled fetches items (items = None: the stored frontier of kind, e.g. result pages added by the first page)'''
+
+    # variables
+    results = []
+
+    # add items to frontier (only these items are fetched, duplicate keys once)
+    if items is not None:
+        items = list({keyFunction(item): item for item in items}.items())
+        journal.addFrontier(kind, items)
+    else:
+        items = journal.frontier(kind)
+    states = journal.states(kind)
+
+    for key, item in items:
+
+        state = states.get(key)
+
+        # completed items are not fetched again
+        if state and state["status"] == "done":
+            results.append(state["result"])
+            continue
+
+        # failed items are only fetched again in retry mode
+        if state and not retryFailed:
+            continue
+
+        # fetch data and record result
+        try:
+            result = fetchFunction(item)
+        except Exception as err:
+            journal.record(kind, key, "failed", reason=repr(err))
+            print("[ERROR]: " + kind + " " + key + " -> " + repr(err))
+            continue
+
+        journal.record(kind, key, "done", result=result)
+        results.append(result)
+
+    # return results (completed items in order of items)
+    return results
+
+
+def journalJobSearch(journal, jobTitle, session=None, retryFailed=False):
+
+    # general variable definition
+    itemsPerPage = 25  # this is defined by stepstone itself
+    jobTitleEncoded = urllib.parse.quote(jobTitle)
+    url = "https://www.stepstone.de/5/ergebnisliste.html?what={0}&of={1}"
+    kind = "result:" + jobTitle
+
+    def fetchResultPage(page):
+
+        # get data
+        soup = crawler.getRequestData(page["url"], session=session, page="result")
+
+        # first page defines the rest of the frontier
+        if page["offset"] == 0:
+            numberOfResults = crawler.getNumberOfResults(soup)
+            print("[INFO] there are "+str(numberOfResults)+" results for job: "+jobTitle)
+            journal.addFrontier(kind, [(url.format(jobTitleEncoded, offset), {"url": url.format(jobTitleEncoded, offset), "offset": offset})
+                                       for offset in range(itemsPerPage, numberOfResults, itemsPerPage)])
+
+        # parse data
+        return crawler.getResultData(soup)
+
+    # first run fetches first page (adds offsets to frontier), second run fetches remaining pages
+    firstPage = {"url": "https://www.stepstone.de/5/ergebnisliste.html?what={0}".format(jobTitleEncoded), "offset": 0}
+    runJournaled(journal, kind, [firstPage], lambda page: page["url"], fetchResultPage, retryFailed)
+    pages = runJournaled(journal, kind, None, lambda page: page["url"], fetchResultPage, retryFailed)
+
+    # return jobList (type of list)
+    return [job for jobs in pages for job in jobs]
+
+
+def journalJobData(journal, jobList, session=None, retryFailed=False):
+
+    # fetch job details (key = job link)
+    return runJournaled(journal, "job", jobList, lambda job: job["jobLink"],
+                        lambda job: crawler.getJobData(job["jobLink"], job["id"], session=session), retryFailed)
+
+
+def journalCompanyData(journal, companyList, session=None, retryFailed=False):
+
+    # fetch company data (key = company link)
+    return runJournaled(journal, "company", companyList, lambda company: company["companyLink"],
+                        lambda company: crawler.getCompanyData(company, session=session), retryFailed)
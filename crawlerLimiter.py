@@ -0,0 +1,132 @@
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic
+
+
+def parseRetryAfter(value):
+
+    # no header -> no delay
+    if not value:
+        return None
+
+    # Retry-After is either seconds or a http date
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostState:
+
+    def __init__(self, limiter):
+
+        # assign variables
+        self.limit = float(limiter.initialConcurrency)
+        self.interval = limiter.initialInterval
+        self.inFlight = 0
+        self.lastStart = 0.0
+        self.backoffUntil = 0.0
+        self.failures = 0
+        self.latency = None
+        self.requests = 0
+        self.errors = 0
+
+
+class AdaptiveLimiter:
+    '''Adaptive per-host rate limiter -> AIMD concurrency, adaptive request interval, Retry-After and jittered exponential backoff.'''
+
+    # status codes which signal throttling/overload
+    throttleStatus = {429, 500, 502, 503, 504}
+
+    def __init__(self, initialConcurrency=2, minConcurrency=1, maxConcurrency=8, initialInterval=0.5, minInterval=0.1,
+                 maxInterval=10.0, latencyTarget=2.0, backoffBase=1.0, maxBackoff=60.0):
+
+        # assign variables
+        self.initialConcurrency = initialConcurrency
+        self.minConcurrency = minConcurrency
+        self.maxConcurrency = maxConcurrency
+        self.initialInterval = initialInterval
+        self.minInterval = minInterval
+        self.maxInterval = maxInterval
+        self.latencyTarget = latencyTarget
+        self.backoffBase = backoffBase
+        self.maxBackoff = maxBackoff
+        self.hosts = {}
+        self.condition = threading.Condition()
+
+    def acquire(self, host):
+        '''acquire blocks until a request to host is allowed'''
+
+        with self.condition:
+
+            state = self.hosts.setdefault(host, HostState(self))
+
+            while True:
+
+                # request is allowed, if there is a free slot and interval/backoff is over
+                now = monotonic()
+                readyAt = max(state.backoffUntil, state.lastStart + state.interval)
+
+                if state.inFlight < max(1, int(state.limit)) and now >= readyAt:
+                    state.inFlight += 1
+                    state.lastStart = now
+                    state.requests += 1
+                    return
+
+                # wait for release or until host is ready
+                self.condition.wait(timeout=max(0.01, readyAt - now))
+
+    def release(self, host, status=None, latency=None, retryAfter=None):
+        '''release reports the outcome of a request (status None = connection error) and returns the backoff delay'''
+
+        with self.condition:
+
+            state = self.hosts[host]
+            state.inFlight -= 1
+            delay = 0.0
+
+            # track latency (exponential moving average)
+            if latency is not None:
+                state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+
+            if status is None or status in AdaptiveLimiter.throttleStatus:
+
+                # multiplicative decrease + slower requests
+                state.errors += 1
+                state.failures += 1
+                state.limit = max(self.minConcurrency, state.limit / 2)
+                state.interval = min(self.maxInterval, state.interval * 2)
+
+                # honor Retry-After, otherwise exponential backoff with jitter
+                delay = retryAfter if retryAfter is not None else min(self.maxBackoff, self.backoffBase * 2 ** (state.failures - 1))
+                delay = delay * random.uniform(1.0, 1.5) if retryAfter is not None else random.uniform(delay / 2, delay)
+                state.backoffUntil = max(state.backoffUntil, monotonic() + delay)
+
+            else:
+
+                state.failures = 0
+
+                # additive increase (only while server is responsive)
+                if state.latency is None or state.latency < self.latencyTarget:
+                    state.limit = min(self.maxConcurrency, state.limit + 1 / state.limit)
+                    state.interval = max(self.minInterval, state.interval * 0.9)
+
+            # wake up waiting threads
+            self.condition.notify_all()
+
+            # return backoff delay
+            return delay
+
+    def statistics(self):
+        '''statistics returns the current state per host'''
+
+        with self.condition:
+            return {host: {"concurrency": state.limit, "interval": state.interval, "inFlight": state.inFlight, "latency": state.latency,
+                           "requests": state.requests, "errors": state.errors} for host, state in self.hosts.items()}
@@ -0,0 +1,214 @@
+import functools
+import json
+import threading
+from time import perf_counter
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+
+        # assign variables (upper bounds, last bucket is +Inf)
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+
+        # find bucket
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        else:
+            self.counts[-1] += 1
+
+        self.sum += value
+        self.count += 1
+
+    def toDict(self):
+
+        # cumulative counts (like prometheus)
+        cumulative = []
+        total = 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+
+        return {"buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], cumulative)), "sum": self.sum, "count": self.count}
+
+
+class CrawlerMetrics:
+    '''Crawler instrumentation -> stage timers, latency/size histograms, status code and item counters (reset at crawl start).'''
+
+    latencyBuckets = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+    sizeBuckets = [1024, 10240, 51200, 102400, 262144, 524288, 1048576, 5242880]
+
+    def __init__(self):
+
+        # assign variables
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        '''reset deletes all recorded metrics and restarts the clock'''
+
+        with self.lock:
+            self.started = perf_counter()
+            self.stages = {}
+            self.status = {}
+            self.items = {}
+            self.latency = Histogram(CrawlerMetrics.latencyBuckets)
+            self.size = Histogram(CrawlerMetrics.sizeBuckets)
+
+    def observeStage(self, stage, seconds):
+
+        with self.lock:
+            timer = self.stages.setdefault(stage, {"count": 0, "seconds": 0.0, "max": 0.0})
+            timer["count"] += 1
+            timer["seconds"] += seconds
+            timer["max"] = max(timer["max"], seconds)
+
+    def observeResponse(self, status, latency, size, fromCache=False):
+
+        with self.lock:
+
+            # cached responses are counted, but not part of network latency
+            key = "cache" if fromCache else str(status)
+            self.status[key] = self.status.get(key, 0) + 1
+
+            if not fromCache:
+                self.latency.observe(latency)
+            self.size.observe(size)
+
+    def countItems(self, kind, count=1):
+
+        with self.lock:
+            self.items[kind] = self.items.get(kind, 0) + count
+
+    def merge(self, data):
+        '''merge adds stages and items of another metrics dict (e.g. recorded in a parser process)'''
+
+        with self.lock:
+
+            for stage, other in data.get("stages", {}).items():
+                timer = self.stages.setdefault(stage, {"count": 0, "seconds": 0.0, "max": 0.0})
+                timer["count"] += other["count"]
+                timer["seconds"] += other["seconds"]
+                timer["max"] = max(timer["max"], other["max"])
+
+            for kind, count in data.get("items", {}).items():
+                self.items[kind] = self.items.get(kind, 0) + count
+
+    def timer(self, stage):
+        '''timer returns a context manager, which records the duration of a stage'''
+        return StageTimer(self, stage)
+
+    def timed(self, stage, items=None):
+        '''timed decorates a function -> duration is recorded as stage, returned items are counted'''
+
+        def decorator(function):
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+
+                with self.timer(stage):
+                    result = function(*args, **kwargs)
+
+                # count items (lists count per element)
+                if items:
+                    self.countItems(items, len(result) if isinstance(result, list) else 1)
+
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def toDict(self):
+        '''toDict returns all metrics (dict)'''
+
+        with self.lock:
+            elapsed = perf_counter() - self.started
+            return {"elapsed": elapsed,
+                    "stages": {stage: dict(timer) for stage, timer in self.stages.items()},
+                    "status": dict(self.status),
+                    "items": dict(self.items),
+                    "itemsPerSecond": {kind: count / elapsed if elapsed else 0.0 for kind, count in self.items.items()},
+                    "latency": self.latency.toDict(),
+                    "responseSize": self.size.toDict()}
+
+    def toJson(self):
+        '''toJson returns all metrics as json string'''
+        return json.dumps(self.toDict(), indent=2)
+
+    def toPrometheus(self, prefix="stepstone_crawler"):
+        '''toPrometheus returns all metrics in prometheus text format'''
+
+        # variables
+        data = self.toDict()
+        lines = []
+
+        lines.append(f"# TYPE {prefix}_stage_seconds summary")
+        for stage, timer in data["stages"].items():
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {timer["seconds"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {timer["count"]}')
+
+        lines.append(f"# TYPE {prefix}_responses_total counter")
+        for status, count in data["status"].items():
+            lines.append(f'{prefix}_responses_total{{status="{status}"}} {count}')
+
+        lines.append(f"# TYPE {prefix}_items_total counter")
+        for kind, count in data["items"].items():
+            lines.append(f'{prefix}_items_total{{kind="{kind}"}} {count}')
+
+        for name, histogram in [("request_latency_seconds", data["latency"]), ("response_size_bytes", data["responseSize"])]:
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{prefix}_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f"{prefix}_{name}_sum {histogram['sum']}")
+            lines.append(f"{prefix}_{name}_count {histogram['count']}")
+
+        # return text
+        return "\n".join(lines) + "\n"
+
+    def printSummary(self):
+        '''printSummary prints a short crawl summary'''
+
+        # variables
+        data = self.toDict()
+
+        print("[INFO] crawl finished after {0:.1f} s".format(data["elapsed"]))
+
+        for stage, timer in sorted(data["stages"].items(), key=lambda item: -item[1]["seconds"]):
+            print("[INFO]   {0:<24} {1:>6} calls {2:>9.2f} s total {3:>8.3f} s avg".format(stage, timer["count"], timer["seconds"], timer["seconds"] / timer["count"]))
+
+        for kind, count in data["items"].items():
+            print("[INFO]   {0:<24} {1:>6} items {2:>9.2f} items/s".format(kind, count, data["itemsPerSecond"][kind]))
+
+        print("[INFO]   responses: " + ", ".join([f"{status}={count}" for status, count in sorted(data["status"].items())]))
+
+        if data["latency"]["count"]:
+            print("[INFO]   avg latency {0:.3f} s, avg response size {1:.0f} bytes".format(
+                data["latency"]["sum"] / data["latency"]["count"], data["responseSize"]["sum"] / data["responseSize"]["count"]))
+
+
+class StageTimer:
+
+    def __init__(self, metrics, stage):
+
+        # assign variables
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.metrics.observeStage(self.stage, perf_counter() - self.start)
+
+
+# shared metrics (used by all crawler modules)
+metrics = CrawlerMetrics()
@@ -0,0 +1,146 @@
+import re as regex
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from bs4.builder import builder_registry
+
+
+class BlockStrainer(SoupStrainer):
+    '''Strainer which keeps tags (incl. subtree) if any attribute matches its pattern -> only required blocks are built.'''
+
+    def __init__(self, rules):
+
+        # rules: attribute name -> regular expression
+        super().__init__()
+        self.rules = {attribute: regex.compile(pattern) for attribute, pattern in rules.items()}
+
+    def matches(self, attrs):
+
+        # no attributes -> nothing to match
+        if not attrs:
+            return False
+
+        for attribute, pattern in self.rules.items():
+
+            # attribute values may be lists (e.g. class)
+            value = attrs.get(attribute)
+            if isinstance(value, (list, tuple)):
+                value = " ".join(value)
+
+            if value and pattern.search(value):
+                return True
+
+        return False
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+
+        # called while parsing by beautifulsoup < 4.13
+        return markup_name if self.matches(markup_attrs) else None
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+
+        # called while parsing by beautifulsoup >= 4.13
+        return self.matches(attrs)
+
+    def allow_string_creation(self, string):
+
+        # strings outside of kept blocks are never required
+        return False
+
+    @property
+    def excludes_everything(self):
+        return False
+
+
+class ExtractionPlan:
+    '''Compiled extraction spec -> finds the first tag for every field in a single tree walk.'''
+
+    def __init__(self, spec):
+
+        # spec: field -> (tag name or None, attribute, value); rules are indexed by attribute and value
+        self.fields = list(spec)
+        self.rules = {}
+
+        for field, (name, attribute, value) in spec.items():
+            self.rules.setdefault(attribute, {}).setdefault(value, []).append((field, name))
+
+    def run(self, element):
+        '''run returns a dict field -> first matching descendant of element (or None)'''
+
+        # variables
+        blocks = dict.fromkeys(self.fields)
+        missing = len(self.fields)
+
+        for tag in element.descendants:
+
+            # only tags with attributes are relevant
+            if not isinstance(tag, Tag) or not tag.attrs:
+                continue
+
+            for attribute, values in self.rules.items():
+
+                value = tag.attrs.get(attribute)
+                if value is None:
+                    continue
+
+                # multi valued attributes (class) match on every single value
+                candidates = value if isinstance(value, list) else [value]
+
+                for candidate in candidates:
+                    for field, name in values.get(candidate, ()):
+
+                        if blocks[field] is None and (name is None or tag.name == name):
+                            blocks[field] = tag
+                            missing -= 1
+
+                            # stop walking, if every field is found
+                            if not missing:
+                                return blocks
+
+        # return blocks (dict)
+        return blocks
+
+
+# blocks required by the extractors (getNumberOfResults/getResultData, getJobData, getCompanyData)
+strainers = {
+    "result": BlockStrainer({"class": r"at-facet-header-total-results|ResultsSectionContainer"}),
+    "job": BlockStrainer({"class": r"js-listing-header|at-section-text-",
+                          "id": r"^js-section-preloaded-LocationWithCommuteTimeBlock$",
+                          "data-block": r"^app-benefitsForListing$"}),
+    "company": BlockStrainer({"id": r"^header-menu$",
+                              "data-block": r"^app-(header|headerV2|reviews|inShort|aboutUs)$"})
+}
+
+# parser settings (html.parser is always available, lxml is much faster)
+defaultParser = "html.parser"
+partialParsing = True
+
+
+def availableParsers():
+
+    # return all installed beautifulsoup tree builders
+    return [parser for parser in ["lxml", "html5lib", "html.parser"] if builder_registry.lookup(parser)]
+
+
+def setParser(parser, partial=True):
+
+    global defaultParser, partialParsing
+
+    # check, if parser is installed
+    if parser not in availableParsers():
+        raise ValueError("parser is not available: " + parser)
+
+    # assign settings
+    defaultParser = parser
+    partialParsing = partial
+
+
+def parseHtml(markup, page=None, parser=None):
+
+    # use default parser
+    if parser is None:
+        parser = defaultParser
+
+    # only build required blocks, if page type is known
+    strainer = strainers.get(page) if partialParsing and page else None
+
+    # return data as soup
+    return BeautifulSoup(markup, parser, parse_only=strainer)
@@ -0,0 +1,167 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import webscraperFunctions as crawler
+from crawlerCompanies import canonicalCompanyKey
+from crawlerMetrics import metrics
+
+# marks the end of a queue
+done = object()
+
+
+def put(target, item, stop):
+
+    # blocking put (backpressure), but give up if pipeline is stopped
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+
+    return False
+
+
+def crawlPipeline(jobTitle, detailWorkers=4, companyWorkers=2, queueSize=50, session=None, companyFetcher=None, archive=None):
+    '''crawlPipeline yields ("result", job), ("job", jobData) and ("company", companyData) tuples while result pages,
+    job details and company profiles are crawled concurrently (bounded queues -> backpressure, flat memory)'''
+
+    # crawl metrics start with this crawl
+    metrics.reset()
+
+    # variables
+    jobQueue = queue.Queue(maxsize=queueSize)
+    companyQueue = queue.Queue(maxsize=queueSize)
+    outputQueue = queue.Queue(maxsize=queueSize)
+    stop = threading.Event()
+
+    def produce():
+
+        # distinct companies (by canonical company key)
+        companies = set()
+
+        try:
+            for job in crawler.iterJobSearch(jobTitle, session=session):
+
+                # pass result to consumer and detail fetchers
+                if not put(outputQueue, ("result", job), stop) or not put(jobQueue, job, stop):
+                    return
+
+                # pass every company only once to company fetchers
+                if canonicalCompanyKey(job["companyLink"]) not in companies:
+                    companies.add(canonicalCompanyKey(job["companyLink"]))
+                    if not put(companyQueue, {"company": job["company"], "companyLink": job["companyLink"]}, stop):
+                        return
+
+        except Exception as err:
+            print("[ERROR]: result pages for job " + jobTitle + " -> " + repr(err))
+
+        finally:
+
+            # signal end of input to every worker
+            for _ in range(detailWorkers):
+                put(jobQueue, done, stop)
+            for _ in range(companyWorkers):
+                put(companyQueue, done, stop)
+
+    def consume(inputQueue, kind, fetch):
+
+        while not stop.is_set():
+
+            # wait for next item
+            try:
+                item = inputQueue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if item is done:
+                break
+
+            # fetch data (failures are printed, like in the notebook)
+            try:
+                data = fetch(item)
+            except Exception as err:
+                print(item)
+                print(err)
+                continue
+
+            if not put(outputQueue, (kind, data), stop):
+                return
+
+        # signal end of worker
+        put(outputQueue, done, stop)
+
+    # start producer and workers
+    threads = [threading.Thread(target=produce, daemon=True)]
+    threads += [threading.Thread(target=consume, args=(jobQueue, "job", lambda job: crawler.getJobData(job["jobLink"], job["id"], session=session, archive=archive)), daemon=True)
+                for _ in range(detailWorkers)]
+    fetchCompany = companyFetcher.fetch if companyFetcher else lambda company: crawler.getCompanyData(company, session=session, archive=archive)
+    threads += [threading.Thread(target=consume, args=(companyQueue, "company", fetchCompany), daemon=True)
+                for _ in range(companyWorkers)]
+
+    for thread in threads:
+        thread.start()
+
+    # yield items until every worker is finished
+    try:
+        remaining = detailWorkers + companyWorkers
+        while remaining:
+            item = outputQueue.get()
+            if item is done:
+                remaining -= 1
+            else:
+                yield item
+
+        # print crawl summary
+        metrics.printSummary()
+
+    finally:
+
+        # consumer stopped early (or pipeline finished) -> stop all threads
+        stop.set()
+
+
+def crawlMultiQuery(jobTitles, detailWorkers=4, session=None, companyFetcher=None, archive=None):
+    '''crawlMultiQuery crawls result pages of all job titles concurrently and fetches details only once per distinct job id'''
+
+    # crawl metrics start with this crawl
+    metrics.reset()
+
+    # distinct jobs (tagged with matching job titles)
+    jobList = crawler.initMultiJobSearch(jobTitles, session=session)
+
+    def fetchJob(job):
+
+        # failures are printed (like in the notebook)
+        try:
+            data = crawler.getJobData(job["jobLink"], job["id"], session=session, archive=archive)
+        except Exception as err:
+            print(job)
+            print(err)
+            return None
+
+        data["queries"] = job["queries"]
+        return data
+
+    # fetch job details
+    with ThreadPoolExecutor(max_workers=detailWorkers) as executor:
+        jobData = [data for data in executor.map(fetchJob, jobList) if data]
+
+    # fetch company data (one request per canonical company)
+    companyList = [{"company": job["company"], "companyLink": job["companyLink"]} for job in jobList]
+    if companyFetcher:
+        companyData = companyFetcher.getCompanyData(companyList, workers=detailWorkers)
+    else:
+        companyData = []
+        for companyDict in {canonicalCompanyKey(company["companyLink"]): company for company in reversed(companyList)}.values():
+            try:
+                companyData.append(crawler.getCompanyData(companyDict, session=session, archive=archive))
+            except Exception as err:
+                print(companyDict)
+                print(err)
+
+    # print crawl summary
+    metrics.printSummary()
+
+    # return results, job details and company data
+    return jobList, jobData, companyData
@@ -0,0 +1,136 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import crawlerParser
+import webscraperFunctions as crawler
+from crawlerMetrics import metrics
+
+
+def measured(function, *args):
+
+    # metrics of parser process are recorded per call and returned with the result (merged by parent process)
+    metrics.reset()
+    result = function(*args)
+    data = metrics.toDict()
+
+    # return result and metrics
+    return result, {"stages": data["stages"], "items": data["items"]}
+
+
+def parseJobPage(content, encoding, jobLink, jobId):
+
+    # parse raw html (runs in parser process)
+    with metrics.timer("parse"):
+        soup = crawlerParser.parseHtml(content.decode(encoding, errors="replace"), "job")
+
+    # return job dictionary
+    return crawler.extractJobData(soup, jobLink, jobId)
+
+
+def parseCompanyPage(content, encoding, companyDict):
+
+    # parse raw html (runs in parser process)
+    with metrics.timer("parse"):
+        soup = crawlerParser.parseHtml(content.decode(encoding, errors="replace"), "company")
+
+    # return company dictionary
+    return crawler.extractCompanyData(companyDict, soup)
+
+
+def parseCompanyProfile(content, encoding, company):
+
+    # parse raw html (runs in parser process)
+    with metrics.timer("parse"):
+        soup = crawlerParser.parseHtml(content.decode(encoding, errors="replace"), "company")
+
+    # return company dictionary
+    return crawler.extractCompanyProfile(company, soup)
+
+
+class ParsingCrawler:
+    '''Crawler with separated stages -> fetch threads (I/O) pass raw html bytes to a process pool of parsers (CPU).'''
+
+    def __init__(self, fetchWorkers=8, parseWorkers=None, session=None):
+
+        # assign variables
+        self.session = session
+        self.fetchPool = ThreadPoolExecutor(max_workers=fetchWorkers)
+
+        # parser processes use the parser settings of this process
+        self.parsePool = ProcessPoolExecutor(max_workers=parseWorkers, initializer=crawlerParser.setParser,
+                                             initargs=(crawlerParser.defaultParser, crawlerParser.partialParsing))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def fetch(self, uri):
+
+        # get data for request (runs in fetch thread)
+        r = crawler.getResponse(uri, session=self.session)
+
+        # return raw html and encoding (same fallback as response.text)
+        return r.content, r.encoding or r.apparent_encoding or "utf-8"
+
+    def parse(self, function, *args):
+
+        # wait for parser process and add its metrics
+        result, data = self.parsePool.submit(measured, function, *args).result()
+        metrics.merge(data)
+
+        # return result
+        return result
+
+    def jobData(self, job):
+
+        # fetch page and wait for parser process
+        content, encoding = self.fetch(job["jobLink"])
+        return self.parse(parseJobPage, content, encoding, job["jobLink"], job["id"])
+
+    def companyData(self, companyDict):
+
+        # fetch company page and wait for parser process
+        content, encoding = self.fetch(companyDict["companyLink"])
+        company = self.parse(parseCompanyPage, content, encoding, companyDict)
+
+        # handle link profile
+        if company["linkProfile"] != None:
+            content, encoding = self.fetch(company["linkProfile"])
+            company = self.parse(parseCompanyProfile, content, encoding, company)
+
+        # return company dictionary
+        return company
+
+    def run(self, function, items):
+
+        # variables
+        results = []
+        futures = [self.fetchPool.submit(function, item) for item in items]
+
+        # collect results in input order (failures are printed, like in the notebook)
+        for item, future in zip(items, futures):
+            try:
+                results.append(future.result())
+            except Exception as err:
+                print(item)
+                print(err)
+
+        # return results (list)
+        return results
+
+    def getJobData(self, jobList):
+        '''getJobData returns job dictionaries for all jobs of jobList'''
+        return self.run(self.jobData, jobList)
+
+    def getCompanyData(self, companyList):
+        '''getCompanyData returns company dictionaries for all companies of companyList'''
+        return self.run(self.companyData, companyList)
+
+    def close(self):
+
+        # shutdown pools
+        self.fetchPool.shutdown()
+        self.parsePool.shutdown()
+
+        # print crawl summary (incl. parse stages and items of parser processes)
+        metrics.printSummary()
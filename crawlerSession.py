@@ -0,0 +1,132 @@
+import threading
+import urllib.parse
+import requests
+from time import monotonic
+from crawlerLimiter import AdaptiveLimiter, parseRetryAfter
+from crawlerMetrics import metrics
+from requests.adapters import HTTPAdapter
+
+
+class CrawlerSession:
+    '''Shared, thread-safe HTTP session with connection pooling, compression, adaptive rate limiting and retry/backoff.'''
+
+    # create header (because script is not running in browser)
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'}
+
+    def __init__(self, poolSize=10, retries=3, timeout=30, cache=None, limiter=None):
+
+        # assign variables
+        self.timeout = timeout
+        self.retries = retries
+        self.cache = cache
+        self.limiter = limiter if limiter else AdaptiveLimiter()
+
+        # connection pool per host (keep-alive connections are reused), no adapter retries -> connection errors and
+        # 429/5xx responses are only retried by the limiter loop in request (backoff, Retry-After)
+        self.adapter = HTTPAdapter(pool_connections=poolSize, pool_maxsize=poolSize, max_retries=0)
+
+        # create session
+        self.session = requests.Session()
+        self.session.headers.update(CrawlerSession.headers)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def get(self, uri, **kwargs):
+        '''get performs a GET request using pooled connections (cached responses do not hit the server)'''
+
+        # use default timeout
+        kwargs.setdefault("timeout", self.timeout)
+
+        # use response cache (opt-in)
+        if self.cache:
+            return self.cache.get(self.request, uri, **kwargs)
+
+        # query data
+        return self.request(uri, **kwargs)
+
+    def request(self, uri, **kwargs):
+        '''request performs a GET request through the adaptive limiter (throttled/failed requests are retried with backoff)'''
+
+        # limiter works per host
+        host = urllib.parse.urlsplit(uri).hostname
+
+        for attempt in range(self.retries + 1):
+
+            # wait until request is allowed
+            with metrics.timer("limiterWait"):
+                self.limiter.acquire(host)
+            start = monotonic()
+            status, retryAfter = None, None
+
+            try:
+                response = self.session.get(uri, **kwargs)
+                status, retryAfter = response.status_code, parseRetryAfter(response.headers.get("Retry-After"))
+            except requests.RequestException:
+                metrics.observeResponse("error", monotonic() - start, 0)
+                if attempt == self.retries:
+                    raise
+                continue
+            finally:
+                # report outcome to limiter for every exception as well (status None and throttling increase backoff)
+                latency = monotonic() - start
+                self.limiter.release(host, status, latency, retryAfter)
+
+            metrics.observeResponse(response.status_code, latency, len(response.content))
+
+            if response.status_code not in AdaptiveLimiter.throttleStatus or attempt == self.retries:
+                return response
+
+    def statistics(self):
+        '''statistics returns connection reuse statistics per host'''
+
+        # variables
+        stats = {}
+
+        # every host has its own connection pool
+        pools = self.adapter.poolmanager.pools
+        with pools.lock:
+            keys = list(pools.keys())
+
+        for key in keys:
+
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            # collect connection data
+            host = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            host["requests"] += pool.num_requests
+            host["connections"] += pool.num_connections
+            host["reused"] += max(0, pool.num_requests - pool.num_connections)
+
+        # add reuse ratio
+        for host in stats.values():
+            host["reuseRatio"] = host["reused"] / host["requests"] if host["requests"] else 0.0
+
+        # return statistics (dict)
+        return stats
+
+    def close(self):
+        '''close closes all pooled connections'''
+        self.session.close()
+
+
+# shared session (created on first use)
+sharedSession = None
+sharedSessionLock = threading.Lock()
+
+
+def getSharedSession():
+
+    global sharedSession
+
+    # create the shared session only once (thread-safe)
+    with sharedSessionLock:
+        if sharedSession is None:
+            sharedSession = CrawlerSession()
+
+    # return session
+    return sharedSession
@@ -1,8 +1,9 @@
 import pandas as pd
 import geopandas as gp
+from preprocessingCounties import CountyResolver
 from wordcloud import WordCloud
 
-def transformLocation(df: pd.DataFrame) -> gp.GeoDataFrame:
+def transformLocation(df: pd.DataFrame, resolver: CountyResolver = None) -> gp.GeoDataFrame:
 
     # convert dict to columns (column location)
     location = pd.concat([df, df["location"].apply(pd.Series)], axis=1).drop(columns="location")
@@ -10,11 +11,8 @@ def transformLocation(df: pd.DataFrame) -> gp.GeoDataFrame:
     # use only german data
     location = location.loc[location["country"] == 'de']
 
-    # drop lon, lat, offCommunityKey == NaN
-    location = location.dropna(subset=["longitude", "latitude", "offCommunityKey"])
-
-    # we need a 5-digit value from 'offCommunityKey'
-    location['AGS'] = location["offCommunityKey"].str[:5]
+    # drop lon, lat == NaN (offCommunityKey is not required, county is assigned by coordinates if it is missing)
+    location = location.dropna(subset=["longitude", "latitude"])
 
     # convert lon/lat to float
     location = location.astype({'longitude': 'float64', 'latitude': 'float64'})
@@ -25,6 +23,18 @@ def transformLocation(df: pd.DataFrame) -> gp.GeoDataFrame:
     # convert gdf crs to epsg=31467    
     gdf = gdf.to_crs(epsg=31467)
 
+    # we need a 5-digit value: 'offCommunityKey' (official key), fallback: county of coordinates (point in polygon)
+    keys = gdf["offCommunityKey"].astype("string")
+    gdf["AGS"] = keys.str[:5].where(keys.str.len() >= 5).astype(object)
+
+    missing = gdf["AGS"].isna()
+    if missing.any():
+        resolver = resolver if resolver is not None else CountyResolver()
+        gdf.loc[missing, "AGS"] = resolver.assign(gdf.loc[missing], columns=["AGS"])["AGS"]
+
+    # drop locations without county
+    gdf = gdf.dropna(subset=["AGS"])
+
     # return gdf
     return gdf
 
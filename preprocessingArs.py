@@ -0,0 +1,84 @@
+import threading
+import pandas as pd
+import unicodedata as unicode
+
+
+def normalizeCity(city):
+
+    # unicode NFC, lower case, single spaces
+    return " ".join(unicode.normalize("NFC", city).lower().split()) if city else city
+
+
+class ArsLookup:
+    '''Official community keys (ARS) by postcode or city name -> mapping table is loaded once, lookups are hash based.'''
+
+    def __init__(self, path="data/Postcode_ARS_mapping_table.csv"):
+
+        # load ARS mapping table
+        ars = pd.read_csv(path, encoding="utf-8", sep=";", dtype=str)
+
+        # offCommunityKey = region + governorate + county + city
+        ars["offCommunityKey"] = ars["ARS_region"] + ars["ARS_governorate"] + ars["ARS_county"] + ars["ARS_city"]
+        self.table = ars
+
+        # indexes (first row wins, like .iloc[0] on the filtered table)
+        self.postcodeIndex = ars.drop_duplicates("postcode").set_index("postcode")["offCommunityKey"]
+        self.cityIndex = ars.drop_duplicates("cityname").set_index("cityname")["offCommunityKey"]
+        self.normalizedCityIndex = ars.assign(cityname=ars["cityname"].map(normalizeCity)).drop_duplicates("cityname").set_index("cityname")["offCommunityKey"]
+
+        # dicts for single lookups
+        self.postcodes = self.postcodeIndex.to_dict()
+        self.cities = self.cityIndex.to_dict()
+        self.normalizedCities = self.normalizedCityIndex.to_dict()
+
+    def byPostcode(self, postcode):
+        return self.postcodes.get(postcode)
+
+    def byCity(self, city):
+
+        # exact city name, then normalized city name
+        key = self.cities.get(city)
+        return key if key or not city else self.normalizedCities.get(normalizeCity(city))
+
+    def lookup(self, postcode, city):
+        '''lookup returns the offCommunityKey by postcode (fallback: city name) or None'''
+
+        key = self.byPostcode(postcode) if postcode else None
+        return key if key else self.byCity(city)
+
+    def lookupPostcodes(self, postcodes):
+        '''lookupPostcodes returns the offCommunityKeys of a Series of postcodes (NaN, if not found)'''
+
+        return pd.Series(postcodes).map(self.postcodeIndex)
+
+    def lookupMany(self, postcodes, cities):
+        '''lookupMany returns the offCommunityKeys of Series of postcodes and city names (vectorized lookup)'''
+
+        # postcode first
+        keys = self.lookupPostcodes(postcodes)
+
+        # fallback: city name, then normalized city name
+        cities = pd.Series(cities, index=keys.index)
+        keys = keys.fillna(cities.map(self.cityIndex))
+        keys = keys.fillna(cities.map(normalizeCity, na_action="ignore").map(self.normalizedCityIndex))
+
+        # return keys (Series)
+        return keys
+
+
+# shared lookup of the preprocessing (mapping table is loaded on first use)
+sharedArsLookup = None
+sharedArsLookupLock = threading.Lock()
+
+
+def getArsLookup():
+
+    global sharedArsLookup
+
+    # load the mapping table only once (thread-safe)
+    with sharedArsLookupLock:
+        if sharedArsLookup is None:
+            sharedArsLookup = ArsLookup()
+
+    # return lookup
+    return sharedArsLookup
@@ -0,0 +1,104 @@
+import threading
+import geopandas as gp
+import numpy as np
+
+# VG250 county layer (Gauss-Krueger zone 3, EPSG:31467)
+countyPath = "mapData/vg250_01-01.gk3.shape.ebenen/vg250_ebenen_0101/VG250_KRS_simplified.shp"
+
+
+def loadCounties(path=countyPath):
+    '''loadCounties returns the german counties (land areas only) with AGS, name and geometry (EPSG:31467)'''
+
+    # attribute table is utf-8 (VG250_KRS.cpg)
+    counties = gp.read_file(path, encoding="utf-8")
+
+    # GF 4 = land area (GF 2 = water area, same AGS)
+    counties = counties.loc[counties["GF"] == 4, ["AGS", "GEN", "BEZ", "SN_L", "geometry"]].reset_index(drop=True)
+
+    # convert crs to epsg=31467 (if necessary)
+    if counties.crs.to_epsg() != 31467:
+        counties = counties.to_crs(epsg=31467)
+
+    # return counties (GeoDataFrame)
+    return counties
+
+
+# shared county layer of the preprocessing (loaded on first use)
+sharedCounties = None
+sharedCountiesLock = threading.Lock()
+
+
+def getCounties():
+
+    global sharedCounties
+
+    # load the county layer only once (thread-safe)
+    with sharedCountiesLock:
+        if sharedCounties is None:
+            sharedCounties = loadCounties()
+
+    # return counties
+    return sharedCounties
+
+
+class CountyResolver:
+    '''Point-in-polygon county assignment (spatial index of the VG250 county layer) -> AGS for coordinates without postcode.'''
+
+    def __init__(self, counties=None):
+
+        # county layer and spatial index (built once)
+        self.counties = counties if counties is not None else getCounties()
+        self.sindex = self.counties.sindex
+
+        # bulk query (query_bulk up to geopandas 0.14, query accepts arrays since 0.12)
+        self.queryBulk = getattr(self.sindex, "query_bulk", None) or self.sindex.query
+
+    def resolve(self, points, maxDistance=1000):
+        '''resolve returns the county index for every point (GeoSeries/GeoDataFrame, -1 if outside of germany)'''
+
+        # convert crs to epsg=31467 (county layer)
+        geometry = points.geometry.to_crs(epsg=31467).reset_index(drop=True)
+
+        # variables
+        index = np.full(len(geometry), -1)
+
+        # point in polygon (single query for all points)
+        pointIndex, countyIndex = self.queryBulk(geometry.values, predicate="within")
+        index[pointIndex] = countyIndex
+
+        # simplified borders: points close to a county (e.g. on the coast) are assigned to the nearest one
+        missing = np.flatnonzero((index == -1) & ~geometry.isna().values & ~geometry.is_empty.fillna(True).values) if maxDistance else []
+        if len(missing):
+
+            # candidate counties (single query, square around point), distances per candidate pair
+            pointIndex, countyIndex = self.queryBulk(geometry.iloc[missing].buffer(maxDistance, cap_style=3).values, predicate="intersects")
+            distances = self.counties.geometry.iloc[countyIndex].reset_index(drop=True).distance(geometry.iloc[missing[pointIndex]].reset_index(drop=True)).values
+
+            # only counties within maxDistance
+            near = distances <= maxDistance
+            pointIndex, countyIndex, distances = pointIndex[near], countyIndex[near], distances[near]
+
+            # nearest county per point (candidates sorted by distance, first one per point wins)
+            order = np.argsort(distances, kind="stable")
+            pointIndex, first = np.unique(pointIndex[order], return_index=True)
+            index[missing[pointIndex]] = countyIndex[order][first]
+
+        # return county index (array)
+        return index
+
+    def assign(self, gdf, columns=("AGS", "GEN", "SN_L")):
+        '''assign returns gdf with county columns (AGS, GEN, SN_L) from point-in-polygon lookup'''
+
+        # variables
+        gdf = gdf.copy()
+        index = self.resolve(gdf)
+        found = index >= 0
+
+        # map county columns (None, if outside of germany)
+        for column in columns:
+            values = np.full(len(gdf), None, dtype=object)
+            values[found] = self.counties[column].values[index[found]]
+            gdf[column] = values
+
+        # return gdf
+        return gdf
@@ -3,13 +3,21 @@ import geopy
 import pandas as pd
 import re as regex
 import unicodedata as unicode
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
+from preprocessingArs import getArsLookup
+from preprocessingGeocoder import coordinateKey, getOfflineGeocoder, getSharedGeocoder, normalizeQuery
 from pymongo import MongoClient
 from time import sleep
 from types import NoneType
 
-def transformLocation(loc, name):
+# precompiled patterns of the transformations
+nonWordPattern = regex.compile(r"\W+")
+camelCasePattern = regex.compile(r"([a-z])([A-Z])")
+nonDigitPattern = regex.compile(r"\D")
+unitPattern = regex.compile(r"\d.*(?:mrd|milliarden|mio|millionen)", regex.IGNORECASE)
+billionPattern = regex.compile(r"\d.*(?:mrd|milliarden)", regex.IGNORECASE)
+millionPattern = regex.compile(r"\d.*(?:mio|millionen)", regex.IGNORECASE)
+
+def transformLocation(loc, name, geocoder=None, offline=True):
     
     # variable definition
     location = dict.fromkeys(["longitude", "latitude", "country", "city", "postCode", "street", "streetNumber", "offCommunityKey"])
@@ -18,15 +26,21 @@ def transformLocation(loc, name):
                        "38436", "40192", "40206", "50427", "50600", "55100", "60256", "60308", "65473", "65926", "66100", "67056", 
                        "80313", "80788", "81363", "82030", "89516", "90318", "90319", "96435 ", "96444", "74167"]
 
-    # init locator service
-    geoLocator = Nominatim(user_agent="stepstone-preprocessing")
+    # init locator service (shared, persistent cache -> only uncached addresses are rate limited)
+    if geocoder is None:
+        geocoder = getSharedGeocoder()
 
-    # we need to wait 1 second to take account of Nominatim usage policy (using ratelimiter)
-    reverse = RateLimiter(geoLocator.reverse, min_delay_seconds=1)
-    geocode = RateLimiter(geoLocator.geocode, min_delay_seconds=1)
+    reverse = geocoder.reverse
+    geocode = geocoder.geocode
 
     try:
 
+        # local-first: postcode/city/county-only locations are resolved without network (ARS table + VG250 counties)
+        if offline:
+            offlineLocation = getOfflineGeocoder().resolve(loc, zipCodesExclude)
+            if offlineLocation:
+                return offlineLocation
+
         # location can be type of string or dictionary -> proper handling
         if isinstance(loc, dict):
 
@@ -188,28 +202,13 @@ def transformLocation(loc, name):
             # noneType = None -> there are no location information
             return location
 
-        # load ARS mapping table
-        ars = pd.read_csv("data/Postcode_ARS_mapping_table.csv", encoding="utf-8", sep=";", dtype=str)
-
         # validate country code (ARS is only working for germany)
         if location["country"].lower() == 'de':
 
-            # map official community key (ARS) for Regionalstatistik
-            if location["postCode"]:
-
-                # check, if we found a location
-                if not ars.loc[ars["postcode"] == location["postCode"]].empty:
-                    arsVal = ars.loc[ars["postcode"] == location["postCode"]]
-                else:
-                    arsVal = ars.loc[ars["cityname"] == location["city"]]
-
-            else:
-                arsVal = ars.loc[ars["cityname"] == location["city"]]
+            # map official community key (ARS) for Regionalstatistik (postcode first, fallback: city name)
+            location["offCommunityKey"] = getArsLookup().lookup(location["postCode"], location["city"])
 
-            # convert offCommunityKey
-            if not arsVal.empty:
-                location["offCommunityKey"] = arsVal.iloc[0]["ARS_region"]+arsVal.iloc[0]["ARS_governorate"]+arsVal.iloc[0]["ARS_county"]+arsVal.iloc[0]["ARS_city"]
-            else:
+            if not location["offCommunityKey"]:
                 print(f'[ERROR]: no mapping found for city {location.get("postcode")} {location.get("city")}')
 
         # return new location structure
@@ -224,6 +223,58 @@ def transformLocation(loc, name):
         # if a error occured -> return an empty object (for integrity)
         return location
 
+def normalizeAddress(text):
+
+    # near-identical spellings -> same query ("Hauptstr. 1", "Hauptstraße 1", "HAUPTSTRASSE  1")
+    text = normalizeQuery(str(text))
+    text = regex.sub(r"(stra(ss|ß)e|str\.?)(?=\s|\d|,|$)", "str ", text)
+    text = regex.sub(r"[^\w,]+", " ", text)
+
+    # return normalized address
+    return regex.sub(r"\s+", " ", text).strip(" ,")
+
+def locationKey(loc, name):
+
+    # key of the geocoding query, which transformLocation would send for loc
+    if isinstance(loc, str):
+        return ("string", normalizeAddress(name.split(" ")[0] if name else ""), normalizeAddress(loc))
+
+    if isinstance(loc, dict):
+
+        # coordinates -> reverse geocoding (or no geocoding, if address is complete)
+        if loc.get("latitude") and loc.get("longitude"):
+            if loc.get("country") and loc.get("city") and loc.get("postalCode") and loc.get("street") and loc.get("streetNumber"):
+                return ("complete",) + tuple(str(loc.get(field)) for field in ["latitude", "longitude", "country", "city", "postalCode", "street", "streetNumber"])
+            return ("reverse", coordinateKey((loc["latitude"], loc["longitude"])))
+
+        # address -> geocoding (company name is used, if there is no street)
+        fields = [loc.get(field) for field in ["street", "streetNumber", "postalCode", "city", "country"]]
+        return ("address", normalizeAddress(name if not loc.get("street") and name else "")) + tuple(normalizeAddress(field) if field else "" for field in fields)
+
+    return ("none",)
+
+def transformLocations(records, geocoder=None, offline=True):
+    '''transformLocations transforms (loc, name) records -> every distinct query is resolved only once, results are fanned out'''
+
+    # variable definition
+    records = list(records)
+    resolved = {}
+
+    # shared geocoder (and rate limiter) for the whole batch
+    if geocoder is None:
+        geocoder = getSharedGeocoder()
+
+    # resolve distinct queries
+    for loc, name in records:
+        key = locationKey(loc, name)
+        if key not in resolved:
+            resolved[key] = transformLocation(loc, name, geocoder, offline)
+
+    print(f"[INFO]: {len(records)} locations -> {len(resolved)} distinct queries")
+
+    # return location structures (one copy per record, same order as records)
+    return [dict(resolved[locationKey(loc, name)]) for loc, name in records]
+
 def transformSectors(sec):
 
     # variable definition
@@ -255,10 +306,10 @@ def transformText(text):
     newText = unicode.normalize("NFC", newText)
 
     # replace any non-word character
-    newText = regex.sub("\W+", " ", newText)
+    newText = nonWordPattern.sub(" ", newText)
     
     # convert camelcase to space separated words
-    newText = regex.sub("([a-z])([A-Z])", "\g<1> \g<2>", newText)
+    newText = camelCasePattern.sub("\g<1> \g<2>", newText)
 
     # string to lower
     newText = newText.lower()
@@ -323,7 +374,7 @@ def transformTurnover(to):
         turnover = to
 
     # we need to convert special cases
-    if regex.search("\d.*(mrd|milliarden|mio|millionen)", turnover, regex.IGNORECASE):
+    if unitPattern.search(turnover):
 
         # split at comma
         split = turnover.split(",")
@@ -333,15 +384,15 @@ def transformTurnover(to):
             split.append("")
 
         # prepare items
-        first =  regex.sub("\D", "", split[0])
-        second = regex.sub("\D", "", split[1]) if split[1] else ""
+        first =  nonDigitPattern.sub("", split[0])
+        second = nonDigitPattern.sub("", split[1]) if split[1] else ""
 
         # handle billion (mrd|milliarden) -> add 0s
-        if regex.search("\d.*(mrd|milliarden)", turnover, regex.IGNORECASE):
+        if billionPattern.search(turnover):
             second = f"{second:0<9}"
 
         # handle million (mio|millionen) -> add 0s
-        if regex.search("\d.*(mio|millionen)", turnover, regex.IGNORECASE):
+        if millionPattern.search(turnover):
             second = f"{second:0<6}"
 
         # create turnover from first+second
@@ -350,7 +401,7 @@ def transformTurnover(to):
     else:
 
         # only digits are relevant
-        turnover = regex.sub("\D", "", turnover)
+        turnover = nonDigitPattern.sub("", turnover)
 
     # convert turnover (str) to turnover (int)
     if turnover:
@@ -385,8 +436,8 @@ def transformWorkers (wrks):
         split.append(None)
 
     # handle splits
-    split[0] = regex.sub("\D", "", split[0]) if split[0] else None
-    split[1] = regex.sub("\D", "", split[1]) if split[1] else None
+    split[0] = nonDigitPattern.sub("", split[0]) if split[0] else None
+    split[1] = nonDigitPattern.sub("", split[1]) if split[1] else None
 
     # create return value
     workers[0] = int(split[0]) if split[0] else None
@@ -395,17 +446,99 @@ def transformWorkers (wrks):
     # return new workers
     return workers
 
+def isEmpty(series):
+
+    # None, NaN and empty values
+    return series.isna() | ~series.fillna("").astype(bool)
+
+def transformSectorsSeries(sec):
+    '''transformSectorsSeries returns transformSectors for every element of a Series (lists of dicts)'''
+
+    # sectors are lists of dicts -> no string operations
+    return pd.Series(sec, dtype=object).map(lambda sector: [item["sectorId"] for item in sector] if sector else [])
+
+def transformTextSeries(text):
+    '''transformTextSeries returns transformText for every element of a Series (vectorized string operations)'''
+
+    # variable definition
+    text = pd.Series(text, dtype=object)
+    empty = isEmpty(text)
+
+    # normalize, replace non-word characters, split camelcase, lower, strip (like transformText)
+    newText = (text.where(~empty, "").str.normalize("NFC")
+                   .str.replace(nonWordPattern, " ", regex=True)
+                   .str.replace(camelCasePattern, r"\1 \2", regex=True)
+                   .str.lower()
+                   .str.strip())
+
+    # return new text (empty text -> "")
+    return newText.where(~empty, "").astype(object)
+
+def transformRatingSeries(rat):
+    '''transformRatingSeries returns transformRating for every element of a Series (nested dicts)'''
+
+    # ratings are nested dicts -> no string operations
+    return pd.Series(rat, dtype=object).map(transformRating)
+
+def transformTurnoverSeries(to):
+    '''transformTurnoverSeries returns transformTurnover for every element of a Series (vectorized string operations)'''
+
+    # variable definition
+    to = pd.Series(to, dtype=object)
+    empty = isEmpty(to)
+    turnover = to.where(~empty, "").astype(str)
+
+    # special cases (mrd|milliarden|mio|millionen): digits before comma + digits after comma filled with 0s
+    special = turnover.str.contains(unitPattern, regex=True)
+    split = turnover.str.split(",")
+    first = split.str[0].str.replace(nonDigitPattern, "", regex=True)
+    second = split.str[1].fillna("").str.replace(nonDigitPattern, "", regex=True)
+    second = second.where(~turnover.str.contains(billionPattern, regex=True), second.str.ljust(9, "0"))
+    second = second.where(~turnover.str.contains(millionPattern, regex=True), second.str.ljust(6, "0"))
+
+    # other cases: only digits are relevant
+    turnover = (first + second).where(special, turnover.str.replace(nonDigitPattern, "", regex=True))
+
+    # return new turnover (int or None)
+    return pd.Series([int(value) if value else None for value in turnover.where(~empty, "")], index=turnover.index, dtype=object)
+
+def transformWorkersSeries(wrks):
+    '''transformWorkersSeries returns transformWorkers for every element of a Series (vectorized string operations)'''
+
+    # variable definition
+    wrks = pd.Series(wrks, dtype=object)
+    empty = isEmpty(wrks)
+
+    # split string at "-" and keep digits only
+    split = wrks.where(~empty, "").astype(str).str.split("-")
+    lower = split.str[0].str.replace(nonDigitPattern, "", regex=True)
+    upper = split.str[1].fillna("").str.replace(nonDigitPattern, "", regex=True)
+
+    # return new workers ([lower, upper], empty -> [None, None])
+    return pd.Series([[int(low) if low else None, int(up) if up else None] for low, up in zip(lower, upper)], index=wrks.index, dtype=object)
+
+# shared mongo client (connection pool, created on first use)
+mongoClient = None
+
+def getMongoClient():
+
+    global mongoClient
+
+    # connect to server only once
+    if mongoClient is None:
+        mongoClient = MongoClient("mongodb://localhost:27017/")
+
+    # return client
+    return mongoClient
+
 def determineCompanyId (companyName):
 
     # handle empty company name
     if not companyName:
         return None
 
-    # connect to server
-    client = MongoClient("mongodb://localhost:27017/")
-
-    # load database
-    companies = client["stepstone-data"]["pCompany"]
+    # load database (pooled client)
+    companies = getMongoClient()["stepstone-data"]["pCompany"]
 
     # we are going to read the company name directly from MongoDb
     mongoData = companies.find_one({"companyName": companyName}, {"companyId": 1, "_id": 0})
@@ -414,4 +547,29 @@ def determineCompanyId (companyName):
     id = mongoData.get("companyId", None) if mongoData else None
 
     # return id
-    return id
\ No newline at end of file
+    return id
+
+def determineCompanyIds(companyNames, companies=None, batchSize=1000):
+    '''determineCompanyIds returns a dict companyName -> companyId (one $in query per batch instead of one query per job)'''
+
+    # load collection (pooled client)
+    if companies is None:
+        companies = getMongoClient()["stepstone-data"]["pCompany"]
+
+    # lookups by company name need an index
+    companies.create_index("companyName")
+
+    # distinct company names (empty names are not resolved)
+    names = list(dict.fromkeys(name for name in companyNames if name))
+    ids = dict.fromkeys(names)
+    found = set()
+
+    # read ids for every batch (first document per name wins, like find_one)
+    for start in range(0, len(names), batchSize):
+        for mongoData in companies.find({"companyName": {"$in": names[start:start + batchSize]}}, {"companyName": 1, "companyId": 1, "_id": 0}):
+            if mongoData["companyName"] not in found:
+                found.add(mongoData["companyName"])
+                ids[mongoData["companyName"]] = mongoData.get("companyId", None)
+
+    # return ids (dict)
+    return ids
@@ -0,0 +1,386 @@
+import json
+import os
+import re as regex
+import sqlite3
+import threading
+import unicodedata as unicode
+from geopy.extra.rate_limiter import RateLimiter
+from geopy.geocoders import Nominatim
+from geopy.location import Location
+from preprocessingArs import getArsLookup, normalizeCity
+from preprocessingCounties import getCounties
+from time import time
+
+
+def normalizeQuery(query):
+
+    # unicode NFC, lower case, single spaces, ", " as separator
+    query = unicode.normalize("NFC", query).lower()
+    query = regex.sub(r"\s*,\s*", ", ", query)
+    query = regex.sub(r"\s+", " ", query)
+
+    # return normalized query
+    return query.strip(" ,")
+
+
+def coordinateKey(query, precision=5):
+
+    # query is "lat, lon" (string) or (lat, lon)
+    if isinstance(query, str):
+        query = query.split(",")
+    latitude, longitude = float(query[0]), float(query[1])
+
+    # return rounded coordinates (5 digits ~ 1 m)
+    return "{0:.{2}f},{1:.{2}f}".format(latitude, longitude, precision)
+
+
+def geohash(latitude, longitude, precision=7):
+
+    # base32 alphabet of geohash
+    alphabet = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+    # variables
+    bounds = [[-90.0, 90.0], [-180.0, 180.0]]
+    cell = ""
+    bits = 0
+    value = 0
+    even = True
+
+    # interleave longitude/latitude bits (5 bits per character)
+    while len(cell) < precision:
+
+        interval = bounds[1] if even else bounds[0]
+        coordinate = longitude if even else latitude
+        middle = (interval[0] + interval[1]) / 2
+
+        if coordinate >= middle:
+            value = value * 2 + 1
+            interval[0] = middle
+        else:
+            value = value * 2
+            interval[1] = middle
+
+        even = not even
+        bits += 1
+
+        if bits == 5:
+            cell += alphabet[value]
+            bits = 0
+            value = 0
+
+    # return cell (precision 7 ~ 150 x 150 m, 8 ~ 40 x 20 m)
+    return cell
+
+
+def gridKey(query, precision=7):
+
+    # query is "lat, lon" (string) or (lat, lon)
+    if isinstance(query, str):
+        query = query.split(",")
+
+    # return grid cell (precision is part of key -> cells of different precisions are not mixed)
+    return "gh{0}:{1}".format(precision, geohash(float(query[0]), float(query[1]), precision))
+
+
+class GeocodingCache:
+    '''Persistent geocoding results (SQLite) -> every address is resolved only once across preprocessing runs.'''
+
+    def __init__(self, path=".cache/geocoding.sqlite"):
+
+        # assign variables
+        self.path = path
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # create directory
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # connect to database (shared between threads, access is serialized by lock)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS geocodes (key TEXT PRIMARY KEY, raw TEXT, storedAt REAL)")
+        self.connection.commit()
+
+    def lookup(self, key):
+        '''lookup returns (found, raw) -> raw is None, if the geocoder did not find the address'''
+
+        with self.lock:
+            row = self.connection.execute("SELECT raw FROM geocodes WHERE key = ?", (key,)).fetchone()
+
+            # count hits and misses
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        # return result
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def store(self, key, raw):
+
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?)", (key, json.dumps(raw), time()))
+            self.connection.commit()
+
+    def statistics(self):
+        '''statistics returns hit/miss statistics and number of cached addresses'''
+
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM geocodes").fetchone()[0]
+            lookups = self.hits + self.misses
+
+        # return statistics (dict)
+        return {"hits": self.hits, "misses": self.misses, "hitRate": self.hits / lookups if lookups else 0.0, "entries": entries}
+
+    def clear(self):
+        '''clear deletes all cache entries'''
+
+        with self.lock:
+            self.connection.execute("DELETE FROM geocodes")
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+
+class CachedGeocoder:
+    '''Nominatim geocoder with persistent cache (cache hits skip the rate limiter, only remote calls wait).
+    Reverse lookups are cached per geohash cell (reversePrecision) -> nearby coordinates reuse the resolved address.'''
+
+    def __init__(self, cache=None, userAgent="stepstone-preprocessing", minDelay=1, geoLocator=None, reversePrecision=7):
+
+        # assign variables
+        self.cache = cache if cache is not None else GeocodingCache()
+        self.geoLocator = geoLocator if geoLocator is not None else Nominatim(user_agent=userAgent)
+        self.reversePrecision = reversePrecision
+        self.stats = {"geocode": {"hits": 0, "misses": 0}, "reverse": {"hits": 0, "misses": 0}}
+        self.lock = threading.Lock()
+
+        # we need to wait 1 second between all requests (geocode and reverse) to take account of Nominatim usage policy
+        # one rate limiter for both kinds, calls are serialized by remoteLock (errors are raised -> they are not cached)
+        self.remote = RateLimiter(lambda function, query, **kwargs: function(query, **kwargs), min_delay_seconds=minDelay, swallow_exceptions=False)
+        self.remoteLock = threading.Lock()
+
+    def geocode(self, query, **kwargs):
+        '''geocode returns the location of an address (like Nominatim.geocode)'''
+
+        return self.resolve("geocode", "geocode:" + normalizeQuery(query), self.geoLocator.geocode, query, kwargs)
+
+    def reverse(self, query, **kwargs):
+        '''reverse returns the address of coordinates (like Nominatim.reverse, cached per grid cell)'''
+
+        # grid cell (reversePrecision None -> coordinates rounded to 5 digits)
+        key = gridKey(query, self.reversePrecision) if self.reversePrecision else coordinateKey(query)
+        return self.resolve("reverse", "reverse:" + key, self.geoLocator.reverse, query, kwargs)
+
+    def resolve(self, kind, key, function, query, kwargs):
+
+        # use cached result
+        found, raw = self.cache.lookup(key)
+
+        with self.lock:
+            self.stats[kind]["hits" if found else "misses"] += 1
+
+        if not found:
+
+            # remote call (rate limited), "not found" is cached as well
+            with self.remoteLock:
+                location = self.remote(function, query, **kwargs)
+            raw = location.raw if location else None
+            self.cache.store(key, raw)
+
+        # return location (None, if address was not found)
+        return toLocation(raw)
+
+    def statistics(self):
+        '''statistics returns cache statistics and hit rate per lookup kind (geocode/reverse)'''
+
+        # variables
+        statistics = self.cache.statistics()
+
+        with self.lock:
+            for kind, counts in self.stats.items():
+                lookups = counts["hits"] + counts["misses"]
+                statistics[kind] = dict(counts, hitRate=counts["hits"] / lookups if lookups else 0.0)
+
+        # reverse cache resolution (for tuning precision against accuracy)
+        statistics["reversePrecision"] = self.reversePrecision
+
+        # return statistics (dict)
+        return statistics
+
+
+def toLocation(raw):
+
+    # cached results are stored as raw nominatim response
+    if raw is None:
+        return None
+
+    # return geopy location
+    return Location(raw.get("display_name", ""), (float(raw["lat"]), float(raw["lon"])), raw)
+
+
+class OfflineGeocoder:
+    '''Local geocoding of postcodes, cities and county names (ARS mapping table + VG250 counties) -> point inside the county and
+    offCommunityKey without network access. Street addresses, unknown and ambiguous locations are left to the remote geocoder.'''
+
+    def __init__(self, ars=None, counties=None):
+
+        # assign variables
+        self.ars = ars if ars is not None else getArsLookup()
+        counties = counties if counties is not None else getCounties()
+        self.stats = {"resolved": 0, "unresolved": 0, "ambiguous": 0}
+
+        # representative point per county (inside the county, unlike the centroid of non-convex counties), stored as lon/lat
+        points = counties.geometry.representative_point().to_crs(epsg=4326)
+        self.points = {ags: (point.x, point.y) for ags, point in zip(counties["AGS"], points)}
+
+        # candidates by postcode and by normalized city name (rows of mapping table -> postcode, city name, offCommunityKey)
+        self.postcodes = {}
+        self.cities = {}
+        for row in zip(self.ars.table["postcode"], self.ars.table["cityname"], self.ars.table["offCommunityKey"]):
+            self.postcodes.setdefault(row[0], []).append(row)
+            self.cities.setdefault(normalizeCity(row[1]), []).append(row)
+
+        # counties by normalized name (München -> Landkreis + Kreisfreie Stadt)
+        self.counties = {}
+        for ags, name, kind in zip(counties["AGS"], counties["GEN"], counties["BEZ"]):
+            self.counties.setdefault(normalizeCity(name), []).append((ags, kind))
+
+    def resolve(self, loc, zipCodesExclude=()):
+        '''resolve returns a location structure or None (-> remote geocoder)'''
+
+        # dictionary: only postcode/city without coordinates and street (street level coordinates are not available locally)
+        if isinstance(loc, dict):
+
+            if (loc.get("latitude") and loc.get("longitude")) or loc.get("street"):
+                return None
+
+            if loc.get("country") and loc.get("country").lower() not in ["de", "deu", "deutschland", "germany"]:
+                return None
+
+            postcode = loc.get("postalCode") if loc.get("postalCode") not in zipCodesExclude else None
+            return self.count(self.match(postcode, loc.get("city")))
+
+        # string: "Wiesbaden", "65183 Wiesbaden", "Landkreis München", "Kassel, Göttingen" (all parts in one county)
+        if isinstance(loc, str):
+
+            matches = [self.match(*splitPostcode(part)) for part in loc.split(",") if part.strip()]
+
+            if not matches or None in matches:
+                return self.count(None)
+            if False in matches or len(set(match["offCommunityKey"][:5] for match in matches)) > 1:
+                return self.count(False)
+
+            return self.count(matches[0])
+
+        return None
+
+    def match(self, postcode, city):
+        '''match returns a location structure, None (unknown) or False (ambiguous)'''
+
+        # some city strings contains a location -> Norderstedt bei Hamburg
+        if city and regex.search(r"\sbei\s", city):
+            city = city.split(" bei ")[0]
+
+        # postcode first (narrowed by city name), fallback: city name
+        candidates = self.postcodes.get(postcode, []) if postcode else []
+        if candidates and city:
+            candidates = [row for row in candidates if normalizeCity(row[1]) == normalizeCity(city)] or candidates
+        if not candidates and city:
+            candidates = self.cities.get(normalizeCity(city), [])
+
+        # fallback: county name (municipality part of offCommunityKey is 000)
+        if not candidates and city:
+            candidates = [(None, name, ags + "000") for ags, name in self.matchCounty(city)]
+
+        if not candidates:
+            return None
+
+        # locations in more than one county are ambiguous
+        if len(set(row[2][:5] for row in candidates)) > 1:
+            return False
+
+        # create location structure (first row wins)
+        location = dict.fromkeys(["longitude", "latitude", "country", "city", "postCode", "street", "streetNumber", "offCommunityKey"])
+        location["longitude"] = str(self.points[candidates[0][2][:5]][0])
+        location["latitude"] = str(self.points[candidates[0][2][:5]][1])
+        location["country"] = "de"
+        location["city"] = candidates[0][1]
+        location["postCode"] = postcode if postcode else ""
+        location["street"] = ""
+        location["streetNumber"] = ""
+        location["offCommunityKey"] = candidates[0][2]
+
+        # return location
+        return location
+
+    def matchCounty(self, name):
+
+        # "Landkreis München" / "Stadt München" select the kind of county
+        kinds = None
+        for prefix, prefixKinds in [("landkreis ", ["Landkreis", "Kreis"]), ("kreis ", ["Landkreis", "Kreis"]), ("stadt ", ["Kreisfreie Stadt", "Stadtkreis"])]:
+            if normalizeCity(name).startswith(prefix):
+                name, kinds = name.strip()[len(prefix):], prefixKinds
+
+        # return (AGS, county name) list
+        return [(ags, name) for ags, kind in self.counties.get(normalizeCity(name), []) if kinds is None or kind in kinds]
+
+    def count(self, location):
+
+        # statistics: resolved / unresolved (None) / ambiguous (False)
+        self.stats["resolved" if location else "unresolved" if location is None else "ambiguous"] += 1
+        return location if location else None
+
+    def statistics(self):
+        return dict(self.stats)
+
+
+def splitPostcode(text):
+
+    # "65183 Wiesbaden" -> ("65183", "Wiesbaden")
+    match = regex.search(r"\b(\d{5})\b", text)
+    city = regex.sub(r"\b\d{5}\b", " ", text).strip() if match else text.strip()
+
+    # return postcode, city
+    return (match.group(1) if match else None, city if city else None)
+
+
+# shared geocoder of the preprocessing (created on first use)
+sharedGeocoder = None
+sharedGeocoderLock = threading.Lock()
+
+
+def getSharedGeocoder(reversePrecision=None):
+
+    global sharedGeocoder
+
+    # create the shared geocoder only once (thread-safe)
+    with sharedGeocoderLock:
+        if sharedGeocoder is None:
+            sharedGeocoder = CachedGeocoder()
+
+        # reverse cache resolution (None -> keep current precision, 0 -> coordinates rounded to 5 digits)
+        if reversePrecision is not None:
+            sharedGeocoder.reversePrecision = reversePrecision
+
+    # return geocoder
+    return sharedGeocoder
+
+
+# shared offline geocoder (mapping table and county layer are loaded on first use)
+sharedOfflineGeocoder = None
+
+
+def getOfflineGeocoder():
+
+    global sharedOfflineGeocoder
+
+    # create the offline geocoder only once (thread-safe)
+    with sharedGeocoderLock:
+        if sharedOfflineGeocoder is None:
+            sharedOfflineGeocoder = OfflineGeocoder()
+
+    # return offline geocoder
+    return sharedOfflineGeocoder
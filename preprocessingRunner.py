@@ -0,0 +1,272 @@
+import argparse
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from pymongo import MongoClient, ReplaceOne, UpdateOne
+import preprocessingFunctions as core
+from preprocessingGeocoder import getSharedGeocoder
+
+# source fields, which are used by the transformations
+companyFields = ["id", "company", "about", "sectors", "workers", "location", "rating", "turnover"]
+jobFields = ["id", "company", "jobTitle", "location", "contractType", "workType", "introduction", "tasks", "applicantProfile", "companyOffer", "benefits"]
+
+
+def documentFingerprint(document, fields, *extra):
+
+    # fingerprint over relevant source fields (+ derived values, e.g. company id)
+    content = "|".join([str(document.get(key)) for key in fields] + [str(value) for value in extra])
+
+    # return fingerprint (str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def companyFingerprints(batch, context=None):
+    return [documentFingerprint(document, companyFields) for document in batch]
+
+
+def jobFingerprints(batch, companyIds):
+
+    # company id is part of the fingerprint (jobs are updated, if their company appears later)
+    return [documentFingerprint(document, jobFields, companyIds.get(document.get("company"))) for document in batch]
+
+
+def iterBatches(cursor, batchSize):
+
+    # stream cursor in batches (memory is bounded by batch size)
+    while True:
+        batch = list(islice(cursor, batchSize))
+        if not batch:
+            return
+        yield batch
+
+
+def transformCompanyBatch(documents, locations):
+    '''transformCompanyBatch returns pCompany documents for a batch of company documents (runs in worker process)'''
+
+    # column-wise transformations
+    descriptions = core.transformTextSeries([document.get("about") for document in documents])
+    sectors = core.transformSectorsSeries([document.get("sectors") for document in documents])
+    workers = core.transformWorkersSeries([document.get("workers") for document in documents])
+    ratings = core.transformRatingSeries([document.get("rating") for document in documents])
+    turnovers = core.transformTurnoverSeries([document.get("turnover") for document in documents])
+
+    # variables
+    companies = []
+
+    for index, document in enumerate(documents):
+
+        # create empty structure
+        data = dict.fromkeys(["_id", "companyId", "companyName", "companyDescription", "sectors", "workers", "location", "rating", "turnover"])
+
+        # move _id (ObjectID for identifying document) and other values
+        data["_id"] = document.get("_id")
+        data["companyId"] = document.get("id")
+        data["companyName"] = document.get("company")
+        data["companyDescription"] = descriptions.iloc[index]
+        data["sectors"] = sectors.iloc[index]
+        data["workers"] = workers.iloc[index]
+        data["location"] = locations[index]
+        data["rating"] = ratings.iloc[index]
+        data["turnover"] = turnovers.iloc[index]
+
+        companies.append(data)
+
+    # return companies (list)
+    return companies
+
+
+def transformJobBatch(documents, locations, companyIds):
+    '''transformJobBatch returns pJobs documents for a batch of job documents (runs in worker process)'''
+
+    # column-wise transformations
+    texts = {field: core.transformTextSeries([document.get(field) for document in documents])
+             for field in ["introduction", "tasks", "applicantProfile", "companyOffer"]}
+
+    # variables
+    jobs = []
+
+    for index, document in enumerate(documents):
+
+        # create empty structure
+        data = dict.fromkeys(["_id", "jobId", "company", "companyId", "title", "location", "contractType",
+                              "workType", "introduction", "tasks", "applicantProfile", "companyOffer", "benefits"])
+
+        # move _id (ObjectID for identifying document) and other values
+        data["_id"] = document.get("_id")
+        data["jobId"] = document.get("id")
+        data["company"] = document.get("company")
+        data["companyId"] = companyIds.get(document.get("company"))
+        data["title"] = document.get("jobTitle")
+        data["location"] = locations[index]
+        data["contractType"] = document.get("contractType")
+        data["workType"] = document.get("workType")
+        data["introduction"] = texts["introduction"].iloc[index]
+        data["tasks"] = texts["tasks"].iloc[index]
+        data["applicantProfile"] = texts["applicantProfile"].iloc[index]
+        data["companyOffer"] = texts["companyOffer"].iloc[index]
+        data["benefits"] = document.get("benefits")
+
+        jobs.append(data)
+
+    # return jobs (list)
+    return jobs
+
+
+def writeBatch(target, documents):
+
+    # unordered upserts (one round trip per batch)
+    if documents:
+        target.bulk_write([ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in documents], ordered=False)
+
+
+def loadFingerprints(state, target):
+
+    # index on collection (the whole state of a collection is read by a single query)
+    state.create_index("collection")
+
+    # return dict source id -> fingerprint for all documents, which are not deleted
+    return {document["sourceId"]: document.get("fingerprint") for document in state.find({"collection": target.name, "deleted": {"$ne": True}}, {"sourceId": 1, "fingerprint": 1, "_id": 0})}
+
+
+def writeFingerprints(state, target, batch, fingerprints):
+
+    # state document per source document (id = collection + source id)
+    state.bulk_write([UpdateOne({"_id": "{0}:{1}".format(target.name, document["_id"])},
+                                {"$set": {"collection": target.name, "sourceId": document["_id"], "fingerprint": fingerprint, "deleted": False}},
+                                upsert=True) for document, fingerprint in zip(batch, fingerprints)], ordered=False)
+
+
+def removeStale(target, state, knownIds, seenIds, batchSize):
+    '''removeStale deletes documents of target, which are not in source anymore, and tombstones them in state'''
+
+    # documents of previous runs (state) and documents without state (written before state existed)
+    stale = [id for id in knownIds if id not in seenIds]
+    stale += [document["_id"] for document in target.find({}, {"_id": 1}) if document["_id"] not in seenIds and document["_id"] not in knownIds]
+
+    for start in range(0, len(stale), batchSize):
+        target.delete_many({"_id": {"$in": stale[start:start + batchSize]}})
+        state.update_many({"collection": target.name, "sourceId": {"$in": stale[start:start + batchSize]}},
+                          {"$set": {"deleted": True, "deletedAt": datetime.now()}})
+
+    # return number of deleted documents
+    return len(stale)
+
+
+def runStage(source, target, state, fingerprintBatch, prepareBatch, transformBatch, executor, batchSize, workers, incremental=False, resolveBatch=None):
+    '''runStage streams source in batches, transforms them in the process pool and writes them to target
+    (incremental: only new and changed documents are transformed, resolveBatch: lookups shared by fingerprints and transformation)'''
+
+    # variables
+    pending = []
+    seenIds = set()
+    count = 0
+    unchanged = 0
+    knownFingerprints = loadFingerprints(state, target)
+
+    def complete():
+
+        # write documents of oldest batch and their fingerprints
+        future, batch, fingerprints = pending.pop(0)
+        documents = future.result()
+        writeBatch(target, documents)
+        writeFingerprints(state, target, batch, fingerprints)
+        return len(documents)
+
+    for batch in iterBatches(source.find({}, batch_size=batchSize), batchSize):
+
+        seenIds.update(document["_id"] for document in batch)
+
+        # lookups of batch (once for fingerprints and transformation)
+        context = resolveBatch(batch) if resolveBatch else None
+
+        # skip documents, which did not change since last run
+        fingerprints = fingerprintBatch(batch, context)
+        if incremental:
+            changed = [(document, fingerprint) for document, fingerprint in zip(batch, fingerprints) if knownFingerprints.get(document["_id"]) != fingerprint]
+            unchanged += len(batch) - len(changed)
+            batch, fingerprints = [document for document, _ in changed], [fingerprint for _, fingerprint in changed]
+            if not batch:
+                continue
+
+        # geocoding (rate limited) and mongo lookups run in this process, transformations in the pool
+        pending.append((executor.submit(transformBatch, batch, *prepareBatch(batch, context)), batch, fingerprints))
+
+        # bounded number of batches in flight
+        while len(pending) > workers:
+            count += complete()
+
+    # write remaining batches
+    while pending:
+        count += complete()
+
+    # remove documents, which are not in source anymore
+    removed = removeStale(target, state, knownFingerprints, seenIds, batchSize)
+    print(f"[INFO]: {count} documents written to {target.name} ({unchanged} unchanged, {removed} removed)")
+
+    # return number of documents
+    return count
+
+
+def prepareCompanies(batch, context=None):
+
+    # locations of batch (distinct queries are resolved once)
+    return (core.transformLocations((document.get("location"), document.get("company")) for document in batch),)
+
+
+def resolveCompanyIds(batch, companies):
+
+    # company ids of batch (one query for all company names)
+    return core.determineCompanyIds((document.get("company") for document in batch), companies)
+
+
+def prepareJobs(batch, companyIds):
+
+    # locations of batch, company ids are resolved by resolveCompanyIds
+    return (core.transformLocations((document.get("location"), document.get("company")) for document in batch), companyIds)
+
+
+def runPreprocessing(database=None, batchSize=500, workers=None, incremental=False, reversePrecision=None):
+    '''runPreprocessing transforms companies -> pCompany and jobs -> pJobs (streamed batches, process pool, bulk upserts)
+    incremental: only new and changed source documents are transformed (fingerprints in preprocessingState)
+    reversePrecision: geohash precision of the reverse geocoding cache (None -> default 7, 0 -> coordinates rounded to 5 digits)'''
+
+    # reverse cache resolution of the shared geocoder (geocoding runs in this process)
+    getSharedGeocoder(reversePrecision)
+
+    # connect to server
+    if database is None:
+        database = MongoClient("mongodb://localhost:27017/")["stepstone-data"]
+
+    # number of processes (= number of batches in flight)
+    workers = workers if workers else os.cpu_count()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+
+        # companies first (job documents need the company ids of pCompany)
+        companies = runStage(database["companies"], database["pCompany"], database["preprocessingState"], companyFingerprints,
+                             prepareCompanies, transformCompanyBatch, executor, batchSize, workers, incremental)
+        jobs = runStage(database["jobs"], database["pJobs"], database["preprocessingState"], jobFingerprints, prepareJobs, transformJobBatch,
+                        executor, batchSize, workers, incremental, lambda batch: resolveCompanyIds(batch, database["pCompany"]))
+
+    # geocoding cache hit rates (tune reversePrecision against accuracy)
+    statistics = getSharedGeocoder().statistics()
+    print("[INFO]: geocoding hit rate {0:.1%} (geocode {1:.1%}, reverse {2:.1%} at precision {3})".format(
+        statistics["hitRate"], statistics["geocode"]["hitRate"], statistics["reverse"]["hitRate"], statistics["reversePrecision"]))
+
+    # return number of documents
+    return {"pCompany": companies, "pJobs": jobs}
+
+
+if __name__ == "__main__":
+
+    # parse arguments
+    parser = argparse.ArgumentParser(description="preprocess companies and jobs (stepstone-data)")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--incremental", action="store_true", help="transform new and changed documents only")
+    parser.add_argument("--reverse-precision", type=int, default=None, help="geohash precision of the reverse geocoding cache (0: rounded coordinates)")
+    args = parser.parse_args()
+
+    runPreprocessing(batchSize=args.batch_size, workers=args.workers, incremental=args.incremental, reversePrecision=args.reverse_precision)
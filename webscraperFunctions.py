@@ -1,15 +1,135 @@
+import asyncio
 import json
 import urllib.parse
-import requests
 import re as regex
 from bs4 import BeautifulSoup
-from time import sleep
+from crawlerMetrics import metrics
+from crawlerParser import ExtractionPlan, parseHtml
+from crawlerSession import getSharedSession
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic, sleep
+
+# extraction plans for job and company pages (compiled once, every plan runs in a single tree walk)
+jobPlan = ExtractionPlan({
+    "header": ("div", "class", "js-listing-header"),
+    "introduction": ("div", "class", "at-section-text-introduction-content"),
+    "tasks": ("div", "class", "at-section-text-description-content"),
+    "applicantProfile": ("div", "class", "at-section-text-profile-content"),
+    "companyOffer": ("div", "class", "at-section-text-weoffer-content"),
+    "location": (None, "id", "js-section-preloaded-LocationWithCommuteTimeBlock"),
+    "benefits": ("div", "data-block", "app-benefitsForListing")})
+
+jobHeaderPlan = ExtractionPlan({
+    "company": (None, "class", "at-header-company-name"),
+    "jobTitle": (None, "class", "at-header-company-jobTitle"),
+    "location": (None, "class", "at-listing__list-icons_location"),
+    "contractType": (None, "class", "at-listing__list-icons_contract-type"),
+    "workType": (None, "class", "at-listing__list-icons_work-type")})
+
+companyPlan = ExtractionPlan({
+    "menu": (None, "id", "header-menu"),
+    "header": (None, "data-block", "app-header")})
+
+companyMenuPlan = ExtractionPlan({
+    "profileTab": (None, "class", "tab-thisCompany")})
+
+companyProfilePlan = ExtractionPlan({
+    "header": (None, "data-block", "app-headerV2"),
+    "rating": (None, "data-block", "app-reviews"),
+    "facts": (None, "data-block", "app-inShort"),
+    "about": (None, "data-block", "app-aboutUs")})
+
+class TokenBucket:
+    '''Token bucket rate limiter -> allows "rate" requests per second with bursts up to "capacity".'''
+
+    def __init__(self, rate, capacity=None):
+
+        # assign variables
+        self.rate = rate
+        self.capacity = capacity if capacity else max(1, rate)
+        self.tokens = self.capacity
+        self.updated = monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        '''waits until a token is available and consumes it'''
+
+        # only one coroutine may refill/consume at a time
+        async with self.lock:
+
+            while True:
+
+                # refill tokens for elapsed time
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                # consume token if available
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                # wait until next token is available
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def runCoroutine(coroutine):
+
+    # check, if there is already a running event loop (e.g. jupyter notebook)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    # we cannot nest event loops -> run coroutine in a separate thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+def initJobSearch(jobTitle, concurrency=None, ratePerSecond=None, session=None):
+
+    # use concurrent crawl mode, if concurrency is set
+    if concurrency:
+        return runCoroutine(initJobSearchAsync(jobTitle, concurrency, ratePerSecond, session))
 
-def initJobSearch(jobTitle):
+    # return jobList (type of list)
+    return list(iterJobSearch(jobTitle, session))
+
+def initMultiJobSearch(jobTitles, concurrency=None, ratePerSecond=None, session=None):
+
+    # variables
+    jobs = {}
+
+    def search(jobTitle):
+
+        # failed searches are printed (like in the notebook)
+        try:
+            return initJobSearch(jobTitle, concurrency, ratePerSecond, session)
+        except Exception as err:
+            print(jobTitle)
+            print(err)
+            return []
+
+    # crawl result pages for all job titles concurrently
+    with ThreadPoolExecutor(max_workers=max(1, len(jobTitles))) as executor:
+        results = list(executor.map(search, jobTitles))
+
+    # merge results -> every job id only once, tagged with all matching job titles
+    for jobTitle, jobList in zip(jobTitles, results):
+        for job in jobList:
+            if job["id"] not in jobs:
+                jobs[job["id"]] = dict(job, queries=[])
+            if jobTitle not in jobs[job["id"]]["queries"]:
+                jobs[job["id"]]["queries"].append(jobTitle)
+
+    # set a message
+    print("[INFO] there are "+str(len(jobs))+" distinct results for "+str(len(jobTitles))+" job titles")
+
+    # return jobList (type of list)
+    return list(jobs.values())
+
+def iterJobSearch(jobTitle, session=None):
 
     # general variable definition
     itemsPerPage = 25  # this is defined by stepstone itself
-    jobList = []
     offset = 25
     url = "https://www.stepstone.de/5/ergebnisliste.html?what={0}"
 
@@ -17,7 +137,7 @@ def initJobSearch(jobTitle):
     jobTitleEncoded = urllib.parse.quote(jobTitle)
 
     # lets get the first page
-    soup = getRequestData(url.format(jobTitleEncoded))
+    soup = getRequestData(url.format(jobTitleEncoded), session=session, page="result")
 
     # get number of results
     numberOfResults = getNumberOfResults(soup)
@@ -25,9 +145,9 @@ def initJobSearch(jobTitle):
     # set a message
     print("[INFO] there are "+str(numberOfResults)+" results for job: "+jobTitle)
 
-    # get result data (link, description, etc.) (appending)
+    # get result data (link, description, etc.) (yield as soon as page is parsed)
     # first page
-    jobList.extend(getResultData(soup))
+    yield from getResultData(soup)
 
     # to retrieve to other data, we iterate above entries until end
     # second page + more
@@ -37,32 +157,94 @@ def initJobSearch(jobTitle):
         url = "https://www.stepstone.de/5/ergebnisliste.html?what={0}&of={1}"
 
         # get data
-        soup = getRequestData(url.format(jobTitleEncoded, offset))
+        soup = getRequestData(url.format(jobTitleEncoded, offset), session=session, page="result")
 
         # parse data
-        jobList.extend(getResultData(soup))
+        yield from getResultData(soup)
 
         # increase offset (by 25)
         offset += itemsPerPage
 
+async def initJobSearchAsync(jobTitle, concurrency=5, ratePerSecond=None, session=None):
+
+    # general variable definition
+    itemsPerPage = 25  # this is defined by stepstone itself
+    jobList = []
+    url = "https://www.stepstone.de/5/ergebnisliste.html?what={0}&of={1}"
+
+    # we need to encode jobTitle (space -> %20, ...)
+    jobTitleEncoded = urllib.parse.quote(jobTitle)
+
+    # politeness is handled by the session limiter, token bucket is an optional fixed cap, semaphore limits parallel requests
+    bucket = TokenBucket(ratePerSecond) if ratePerSecond else None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(uri):
+
+        # wait for free slot (and token), request runs in worker thread
+        async with semaphore:
+            if bucket:
+                await bucket.acquire()
+            return await asyncio.to_thread(getRequestData, uri, 0, session, "result")
+
+    # lets get the first page
+    soup = await fetch("https://www.stepstone.de/5/ergebnisliste.html?what={0}".format(jobTitleEncoded))
+
+    # get number of results
+    numberOfResults = getNumberOfResults(soup)
+
+    # set a message
+    print("[INFO] there are "+str(numberOfResults)+" results for job: "+jobTitle)
+
+    # first page
+    jobList.extend(getResultData(soup))
+
+    # second page + more (fetched concurrently, gather keeps offset order)
+    offsets = range(itemsPerPage, numberOfResults, itemsPerPage)
+    soups = await asyncio.gather(*[fetch(url.format(jobTitleEncoded, offset)) for offset in offsets])
+
+    # parse data
+    for soup in soups:
+        jobList.extend(getResultData(soup))
+
     # return jobList (type of list)
     return jobList
 
-def getRequestData(uri):
+def getRequestData(uri, wait=0, session=None, page=None):
+
+    # get data for request
+    r = getResponse(uri, wait, session)
+
+    # return data as soup
+    return parseResponse(r, page)
+
+def parseResponse(r, page=None):
+
+    # return data as soup (page type selects the blocks to parse)
+    with metrics.timer("parse"):
+        return parseHtml(r.text, page)
 
-    # create header (because script is not running in browser)
-    header = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.99 Safari/537.36'}
+def getResponse(uri, wait=0, session=None):
+
+    # use shared session (keep-alive connections, compression, adaptive rate limit, retries)
+    if session is None:
+        session = getSharedSession()
 
     # get data for request
-    r = requests.get(uri, timeout=30, headers=header)
-    
+    with metrics.timer("fetch"):
+        r = session.get(uri)
 
-     # we need to wait 0.5 sec (to prevent spam ban)
-    sleep(0.5)
+    # network responses are recorded by the session
+    if getattr(r, "fromCache", False):
+        metrics.observeResponse(r.status_code, 0, len(r.content), fromCache=True)
 
-    # return data as soup
-    return BeautifulSoup(r.text, "html.parser")
+    # politeness is handled by the session limiter, wait adds a fixed delay (cached responses did not hit the server)
+    if wait and not getattr(r, "fromCache", False):
+        with metrics.timer("wait"):
+            sleep(wait)
+
+    # return response
+    return r
 
 
 def getNumberOfResults(soup: BeautifulSoup):
@@ -77,6 +259,7 @@ def getNumberOfResults(soup: BeautifulSoup):
     return count
 
 
+@metrics.timed("getResultData", items="results")
 def getResultData(soup: BeautifulSoup):
 
     # variables
@@ -107,7 +290,41 @@ def getResultData(soup: BeautifulSoup):
     # return jobs (list)
     return jobs
 
-def getCompanyData(companyDict): 
+def getCompanyData(companyDict, session=None, archive=None): 
+
+    # first get request
+    r = getResponse(companyDict["companyLink"], session=session)
+    soup = parseResponse(r, "company")
+
+    # extract data from company page
+    company = extractCompanyData(companyDict, soup)
+
+    # raw pages are archived, company holds references only (instead of json)
+    if archive:
+        company["store"] = {"jobs": archive.store(companyDict["companyLink"], r.content, r.encoding or r.apparent_encoding)}
+
+    # handle link profile
+    if company["linkProfile"] != None:
+
+        # get profile soup
+        r = getResponse(company["linkProfile"], session=session)
+        soupProfile = parseResponse(r, "company")
+
+        # extract data from profile page
+        extractCompanyProfile(company, soupProfile)
+
+        if archive:
+            company["store"]["profile"] = archive.store(company["linkProfile"], r.content, r.encoding or r.apparent_encoding)
+
+    # json data can be re-parsed from archive
+    if archive:
+        del company["json"]
+
+    # return company dictionary
+    return company
+
+@metrics.timed("extractCompanyData", items="companies")
+def extractCompanyData(companyDict, soup: BeautifulSoup):
     
     # variables
     company = dict.fromkeys(["company", "linkJobs", "linkProfile", "id", "sectors", "workers", "homepage", "about"])
@@ -119,34 +336,29 @@ def getCompanyData(companyDict):
     company["company"] = companyDict["company"]
     company["linkJobs"] = companyDict["companyLink"]
 
-    # first get request
-    soup = getRequestData(companyDict["companyLink"])
+    # extract data areas from soup (single pass)
+    blocks = companyPlan.run(soup)
 
     # some companies dont have a menu
-    if soup.find(id="header-menu"):
+    if blocks["menu"]:
 
         # validate company profile
         try:
-            if soup.find(id="header-menu").find(attrs={"class": "tab-thisCompany" }):
-                company["linkProfile"] = "https://www.stepstone.de"+soup.find(id="header-menu").find(attrs={"class":"tab-thisCompany"}).findChild()["href"]
+            profileTab = companyMenuPlan.run(blocks["menu"])["profileTab"]
+            if profileTab:
+                company["linkProfile"] = "https://www.stepstone.de"+profileTab.findChild()["href"]
 
         except:
             company["linkProfile"] = None
 
-    # handle link profile
-    if company["linkProfile"] != None:
-
-        # get profile soup
-        soupProfile = getRequestData(company["linkProfile"])
+    # profile page is extracted by extractCompanyProfile
+    if company["linkProfile"] == None:
 
         # get company id
-        company["id"] = soupProfile.find(attrs={"data-block": "app-headerV2"})["data-companyid"]       
+        company["id"] = blocks["header"]["data-companyid"]
 
-        # extract data areas (attribute data-initialdata)
-        companyHeader = (soupProfile.find(attrs={"data-block": "app-headerV2"})["data-initialdata"] if soupProfile.find(attrs={"data-block": "app-headerV2"}) else None)
-        companyRating = (soupProfile.find(attrs={"data-block": "app-reviews"})["data-initialdata"] if soupProfile.find(attrs={"data-block": "app-reviews"}) else None)
-        companyFacts = (soupProfile.find(attrs={"data-block": "app-inShort"})["data-initialdata"] if soupProfile.find(attrs={"data-block": "app-inShort"}) else None)
-        companyAbout = (soupProfile.find(attrs={"data-block": "app-aboutUs"}) if soupProfile.find(attrs={"data-block": "app-aboutUs"}) else None)
+        # extract data (attribute data-initialdata)
+        companyHeader = blocks["header"]["data-initialdata"]
 
         if companyHeader:
 
@@ -157,143 +369,182 @@ def getCompanyData(companyDict):
             company["sectors"] = (companyHeaderJson['sectors'] if companyHeaderJson['sectors'] else None)
             company["workers"] = (companyHeaderJson['metaData']['people'] if companyHeaderJson['metaData']['people'] else None)
             company["homepage"] = (companyHeaderJson['metaData']['page'] if companyHeaderJson['metaData']['page'] else None)
+            company["location"] = (companyHeaderJson['metaData']['location'] if companyHeaderJson['metaData']['location'] else None)
 
             # save json data to distinct element
-            company["json"]["Header"] = companyHeaderJson
+            company["json"]["Header"] = companyHeaderJson   
 
-        if companyRating:
+    # return company dictionary
+    return company
 
-            # extracted data are type of json -> parse
-            companyRatingJson = json.loads(companyRating)
+@metrics.timed("extractCompanyProfile")
+def extractCompanyProfile(company, soupProfile: BeautifulSoup):
 
-            # extract ratings
-            company["rating"]["overall"] = (companyRatingJson['ratingSummary']['surveysCount'] if companyRatingJson['ratingSummary']['surveysCount']  else None)
-            company["rating"]["avgRating"] = (companyRatingJson['ratingSummary']['overallRatingAvg'] if companyRatingJson['ratingSummary']['overallRatingAvg']  else None)
-            company["rating"]["participation"] = (companyRatingJson["overallRatingRepartitionByRating"] if companyRatingJson["overallRatingRepartitionByRating"] else None)
-            company["rating"]["subrating"] = (companyRatingJson["subRatings"] if companyRatingJson["subRatings"] else None)
+    # extract data areas from profile soup (single pass)
+    profileBlocks = companyProfilePlan.run(soupProfile)
 
-            # save json data to distinct element
-            company["json"]["Rating"] = companyRatingJson
+    # get company id
+    company["id"] = profileBlocks["header"]["data-companyid"]
 
-        if companyFacts:
-            
-            # extracted data are type of json -> parse
-            companyFactsJson = json.loads(companyFacts)
+    # extract data areas (attribute data-initialdata)
+    companyHeader = (profileBlocks["header"]["data-initialdata"] if profileBlocks["header"] else None)
+    companyRating = (profileBlocks["rating"]["data-initialdata"] if profileBlocks["rating"] else None)
+    companyFacts = (profileBlocks["facts"]["data-initialdata"] if profileBlocks["facts"] else None)
+    companyAbout = profileBlocks["about"]
 
-            # extract facts (may overwrite some fields)
-            company["location"]["street"] = (companyFactsJson['street'] if companyFactsJson['street'] else None)
-            company["location"]["streetNumber"] = (companyFactsJson['streetNumber'] if companyFactsJson['streetNumber'] else None)
-            company["location"]["postalCode"] = (companyFactsJson['postalCode'] if companyFactsJson['postalCode'] else None)
-            company["location"]["city"] = (companyFactsJson['city'] if companyFactsJson['city'] else None)
-            company["location"]["country"] = (companyFactsJson['country'] if companyFactsJson['country'] else None)
-            company["turnover"] = (companyFactsJson['turnover'] if companyFactsJson['turnover'] else None)
+    if companyHeader:
 
-            # save json data to distinct element
-            company["json"]["Facts"] = companyFactsJson
+        # extracted data are type of json -> parse
+        companyHeaderJson = json.loads(companyHeader)
 
-        if companyAbout:
+        # extract data from header
+        company["sectors"] = (companyHeaderJson['sectors'] if companyHeaderJson['sectors'] else None)
+        company["workers"] = (companyHeaderJson['metaData']['people'] if companyHeaderJson['metaData']['people'] else None)
+        company["homepage"] = (companyHeaderJson['metaData']['page'] if companyHeaderJson['metaData']['page'] else None)
 
-            # extract about us (as string with linebreaks)
-            company["about"] = "\r\n".join([p.text for p in companyAbout.findAll("p")])
+        # save json data to distinct element
+        company["json"]["Header"] = companyHeaderJson
 
-    else:
+    if companyRating:
 
-        # get company id
-        company["id"] = soup.find(attrs={"data-block": "app-header"})["data-companyid"]
+        # extracted data are type of json -> parse
+        companyRatingJson = json.loads(companyRating)
 
-        # extract data (attribute data-initialdata)
-        companyHeader = soup.find(attrs={"data-block": "app-header"})["data-initialdata"]
+        # extract ratings
+        company["rating"]["overall"] = (companyRatingJson['ratingSummary']['surveysCount'] if companyRatingJson['ratingSummary']['surveysCount']  else None)
+        company["rating"]["avgRating"] = (companyRatingJson['ratingSummary']['overallRatingAvg'] if companyRatingJson['ratingSummary']['overallRatingAvg']  else None)
+        company["rating"]["participation"] = (companyRatingJson["overallRatingRepartitionByRating"] if companyRatingJson["overallRatingRepartitionByRating"] else None)
+        company["rating"]["subrating"] = (companyRatingJson["subRatings"] if companyRatingJson["subRatings"] else None)
 
-        if companyHeader:
+        # save json data to distinct element
+        company["json"]["Rating"] = companyRatingJson
 
-            # extracted data are type of json -> parse
-            companyHeaderJson = json.loads(companyHeader)
+    if companyFacts:
+        
+        # extracted data are type of json -> parse
+        companyFactsJson = json.loads(companyFacts)
 
-            # extract data from header
-            company["sectors"] = (companyHeaderJson['sectors'] if companyHeaderJson['sectors'] else None)
-            company["workers"] = (companyHeaderJson['metaData']['people'] if companyHeaderJson['metaData']['people'] else None)
-            company["homepage"] = (companyHeaderJson['metaData']['page'] if companyHeaderJson['metaData']['page'] else None)
-            company["location"] = (companyHeaderJson['metaData']['location'] if companyHeaderJson['metaData']['location'] else None)
+        # extract facts (may overwrite some fields)
+        company["location"]["street"] = (companyFactsJson['street'] if companyFactsJson['street'] else None)
+        company["location"]["streetNumber"] = (companyFactsJson['streetNumber'] if companyFactsJson['streetNumber'] else None)
+        company["location"]["postalCode"] = (companyFactsJson['postalCode'] if companyFactsJson['postalCode'] else None)
+        company["location"]["city"] = (companyFactsJson['city'] if companyFactsJson['city'] else None)
+        company["location"]["country"] = (companyFactsJson['country'] if companyFactsJson['country'] else None)
+        company["turnover"] = (companyFactsJson['turnover'] if companyFactsJson['turnover'] else None)
 
-            # save json data to distinct element
-            company["json"]["Header"] = companyHeaderJson   
+        # save json data to distinct element
+        company["json"]["Facts"] = companyFactsJson
+
+    if companyAbout:
+
+        # extract about us (as string with linebreaks)
+        company["about"] = "\r\n".join([p.text for p in companyAbout.findAll("p")])
 
     # return company dictionary
     return company
+
+def extractSectionText(section):
+
+    # define extractable tag types
+    tags = section.findAll(["p", "li"])
+
+    # return text with linebreaks (or None)
+    return ("\r\n".join([tag.text for tag in tags]) if tags else None)
     
-def getJobData(jobLink, jobId): 
+def getJobData(jobLink, jobId, session=None, archive=None): 
+
+    # get request
+    r = getResponse(jobLink, session=session)
+    soup = parseResponse(r, "job")
+
+    # without archive, the html of all sections is stored in job
+    if archive is None:
+        return extractJobData(soup, jobLink, jobId)
+
+    # raw page is archived, job holds the reference only
+    job = extractJobData(soup, jobLink, jobId, store=False)
+    job["store"] = {"page": archive.store(jobLink, r.content, r.encoding or r.apparent_encoding)}
+
+    # return job dictionary
+    return job
+
+@metrics.timed("extractJobData", items="jobs")
+def extractJobData(soup: BeautifulSoup, jobLink, jobId, store=True):
 
     # variables
     job = dict.fromkeys(["id", "link", "company", "jobTitle", "location", "contractType", "workType", "introduction", "tasks", "applicantProfile", "companyOffer", "benefits"])
     job["store"] = {}
 
-    # define extractable tag types
-    tagTypes = ["p", "li"]
-
     # set id + link
     job["id"] = jobId
     job["link"] = jobLink
 
-    # get request
-    soup = getRequestData(jobLink)
-    
-    # extract data areas from soup
-    jobHeader = soup.find("div", attrs={"class":"js-listing-header"})
-    jobIntroduction = soup.find("div", attrs={"class":"at-section-text-introduction-content"})
-    jobTaskDescription = soup.find("div", attrs={"class": "at-section-text-description-content"})
-    jobYourProfile = soup.find("div", attrs={"class": "at-section-text-profile-content"})
-    jobCompanyOffer = soup.find("div", attrs={"class": "at-section-text-weoffer-content"})
-    jobLocation = (regex.split("\s\=\s(?=\{.*)", soup.find(id="js-section-preloaded-LocationWithCommuteTimeBlock").string)[1] if soup.find(id="js-section-preloaded-LocationWithCommuteTimeBlock") else None)
-    jobBenefits = (soup.find("div", attrs={"data-block": "app-benefitsForListing"})["data-initialdata"] if soup.find("div", attrs={"data-block": "app-benefitsForListing"}) else None)
+    # extract data areas from soup (single pass)
+    blocks = jobPlan.run(soup)
+
+    jobHeader = blocks["header"]
+    jobIntroduction = blocks["introduction"]
+    jobTaskDescription = blocks["tasks"]
+    jobYourProfile = blocks["applicantProfile"]
+    jobCompanyOffer = blocks["companyOffer"]
+    jobLocation = (regex.split("\s\=\s(?=\{.*)", blocks["location"].string)[1] if blocks["location"] else None)
+    jobBenefits = (blocks["benefits"]["data-initialdata"] if blocks["benefits"] else None)
 
     # extract header data
     if jobHeader:
 
         # extracted data are type of soup
-        job["company"] = (jobHeader.find(attrs={"class": "at-header-company-name"}).text if jobHeader.find(attrs={"class": "at-header-company-name"}) else None)
-        job["jobTitle"] = (jobHeader.find(attrs={"class": "at-header-company-jobTitle"}).text if jobHeader.find(attrs={"class": "at-header-company-jobTitle"}) else None)
-        job["location"] = (jobHeader.find(attrs={"class": "at-listing__list-icons_location"}).text if jobHeader.find(attrs={"class": "at-listing__list-icons_location"}) else None)
-        job["contractType"] = (jobHeader.find(attrs={"class": "at-listing__list-icons_contract-type"}).text if jobHeader.find(attrs={"class": "at-listing__list-icons_contract-type"}) else None)
-        job["workType"] = (jobHeader.find(attrs={"class": "at-listing__list-icons_work-type"}).text if jobHeader.find(attrs={"class": "at-listing__list-icons_work-type"}) else None)
+        header = jobHeaderPlan.run(jobHeader)
+
+        job["company"] = (header["company"].text if header["company"] else None)
+        job["jobTitle"] = (header["jobTitle"].text if header["jobTitle"] else None)
+        job["location"] = (header["location"].text if header["location"] else None)
+        job["contractType"] = (header["contractType"].text if header["contractType"] else None)
+        job["workType"] = (header["workType"].text if header["workType"] else None)
 
         # store data
-        job["store"]["header"] = str(jobHeader)
+        if store:
+            job["store"]["header"] = str(jobHeader)
 
     # extract job introduction
     if jobIntroduction:
 
         # extracted data are type of soup
-        job["introduction"] = ("\r\n".join([tag.text for tag in jobIntroduction.findAll(tagTypes)]) if jobIntroduction.findAll(tagTypes) else None)
+        job["introduction"] = extractSectionText(jobIntroduction)
 
         # store data
-        job["store"]["introduction"] = str(jobIntroduction)
+        if store:
+            job["store"]["introduction"] = str(jobIntroduction)
 
     # extract job tasks
     if jobTaskDescription:
 
         # extracted data are type of soup
-        job["tasks"] = ("\r\n".join([tag.text for tag in jobTaskDescription.findAll(tagTypes)]) if jobTaskDescription.findAll(tagTypes) else None)
+        job["tasks"] = extractSectionText(jobTaskDescription)
 
         # store data
-        job["store"]["tasks"] = str(jobTaskDescription)
+        if store:
+            job["store"]["tasks"] = str(jobTaskDescription)
 
     # extract applicant profile
     if jobYourProfile:
 
         # extracted data are type of soup
-        job["applicantProfile"] = ("\r\n".join([tag.text for tag in jobYourProfile.findAll(tagTypes)]) if jobYourProfile.findAll(tagTypes) else None)
+        job["applicantProfile"] = extractSectionText(jobYourProfile)
 
         # store data
-        job["store"]["applicantProfile"] = str(jobYourProfile)
+        if store:
+            job["store"]["applicantProfile"] = str(jobYourProfile)
 
     # extract job offering
     if jobCompanyOffer:
 
         # extracted data are type of soup
-        job["companyOffer"] = ("\r\n".join([tag.text for tag in jobCompanyOffer.findAll(tagTypes)]) if jobCompanyOffer.findAll(tagTypes) else None)
+        job["companyOffer"] = extractSectionText(jobCompanyOffer)
 
         # store data
-        job["store"]["companyOffer"] = str(jobCompanyOffer)
+        if store:
+            job["store"]["companyOffer"] = str(jobCompanyOffer)
 
     # extract job location
     if jobLocation:
@@ -312,7 +563,8 @@ def getJobData(jobLink, jobId):
         job["location"] = location
 
         # store data
-        job["store"]["location"] = jobLocation
+        if store:
+            job["store"]["location"] = jobLocation
 
     # extract job benefits
     if jobBenefits:
@@ -324,7 +576,8 @@ def getJobData(jobLink, jobId):
         job["benefits"] = ([benefit['benefitName'] for benefit in jsonBenefits] if jsonBenefits else None)
         
         # store data
-        job["store"]["benefits"] = jobBenefits
+        if store:
+            job["store"]["benefits"] = jobBenefits
 
     # return job dictionary
-    return job
\ No newline at end of file
+    return job